@@ -0,0 +1,7 @@
+"""Camera capture controller for the PLC-driven inspection station.
+
+Submodules are imported on demand so that tools such as the simulator or
+the parser benchmark start without loading OpenCV or tqdm.
+"""
+
+__version__ = "0.2.0"
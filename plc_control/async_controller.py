@@ -0,0 +1,116 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# AsyncController Class
+# =========================
+
+class AsyncController:
+    """Run the PLC handshake on an asyncio event loop.
+
+    The serial port's file descriptor is registered with ``loop.add_reader``,
+    so incoming bytes are parsed as soon as they arrive instead of in a
+    blocking ``read_data()`` loop. Commands are dispatched to coroutine
+    handlers; camera reads run on a single-thread executor (the device is not
+    thread safe) and frame storage on a separate encode executor, so serial
+    I/O, capture and writes overlap. Acks are written on a serial executor of
+    their own, so a stalled port never blocks an event loop that other
+    stations share. The synchronous ``CommandHandler`` keeps
+    owning the naming, output and progress state and stays usable on its own.
+    """
+
+    def __init__(self, serial_controller, handler, encode_workers=2):
+        self.serial = serial_controller
+        self.handler = handler
+        self.camera_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="camera")
+        self.encode_executor = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="encode")
+        self.serial_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serial-write")
+        self.handlers = {
+            400: self.handle_capture,
+            700: self.handle_exit,
+        }
+        self._queue = None
+
+    def _on_readable(self):
+        """Event-loop callback: drain the serial port and queue complete commands."""
+        port = self.serial.serial_port
+        try:
+            data = port.read(port.in_waiting or 1)
+        except Exception as e:
+            self.serial.read_errors += 1
+            log.error("Failed to read data: %s", e)
+            return
+        received_at = time.monotonic()
+        for command in self.serial.parser.parse(data):
+            self._queue.put_nowait((command, received_at))
+
+    async def run(self):
+        """Process PLC commands until the exit command (700) arrives."""
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        fd = self.serial.serial_port.fileno()
+        loop.add_reader(fd, self._on_readable)
+        try:
+            while True:
+                command, received_at = await self._queue.get()
+                handler = self.handlers.get(command.command)
+                if handler is None:
+                    if self.handler.metrics is not None:
+                        self.handler.metrics.unknown_command()
+                    log.warning("Unknown command received: %s", command.command)
+                    continue
+                if await handler(command, received_at):
+                    break
+        finally:
+            loop.remove_reader(fd)
+
+    async def handle_capture(self, command, received_at):
+        loop = asyncio.get_running_loop()
+        handler = self.handler
+        if command.layer is None or command.section is None:
+            await loop.run_in_executor(self.serial_executor, handler.reject_capture)
+            return False
+        layer = command.layer + handler.layer_offset
+        if await loop.run_in_executor(self.serial_executor, handler.resume_section, layer, command.section,
+                                      received_at):
+            return False
+        span = handler.tracer.begin(layer, command.section, received_at)
+        save_path = await loop.run_in_executor(
+            self.camera_executor, handler.prepare_capture, layer, command.section, span
+        )
+        frame = await loop.run_in_executor(
+            self.camera_executor, handler.acquire_frame, layer, command.section, received_at, span
+        )
+        captured = frame is not None and await loop.run_in_executor(
+            self.encode_executor, handler.store_frame, layer, command.section, save_path, frame, received_at
+        )
+        span.mark("store")
+        await loop.run_in_executor(self.serial_executor, handler.acknowledge_capture, captured)
+        span.mark("ack")
+        span.end(500 if captured else 600)
+        if captured:
+            handler.queue_preview(layer, command.section, save_path, frame)
+        if frame is not None:
+            handler.camera.release_frame(frame)
+        return False
+
+    async def handle_exit(self, command, received_at):
+        log.info("Exit command received. Terminating program.")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.serial_executor, self.serial.write_data, 700)
+        if self.handler.metrics is not None:
+            self.handler.metrics.ack(700)
+        await loop.run_in_executor(self.encode_executor, self.handler.finish_writes, True)
+        return True
+
+    def close(self):
+        self.camera_executor.shutdown(wait=True)
+        self.encode_executor.shutdown(wait=True)
+        self.serial_executor.shutdown(wait=True)
@@ -0,0 +1,235 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from .capture_trace import percentile
+from .simulator import FdTransport, PLCSimulator
+from .synthetic_camera import SyntheticCapture
+
+
+LAYERS = [1, 8, 12, 18, 24, 30, 36, 40, 45, 60, 60]  # 334 sections, same recipe as the PLC
+WRITER_PENDING = 8  # Frames the async writer holds at most, counted in the frame pool size check
+
+DEFAULT_CONFIGS = [
+    "sink=png:9,writer=sync,flush=3",
+    "sink=png:9,writer=async,flush=3",
+    "sink=png:1,writer=async,flush=3",
+    "sink=tiff,writer=async,flush=3",
+    "sink=npy,writer=async,flush=3",
+    "sink=png:9,writer=container,flush=3",
+    "sink=png:9,writer=async,flush=0,grabber=1",
+    "sink=png:9,writer=async,fresh=1",
+    "sink=png:9,writer=async,flush=3,pool=16",
+]
+
+
+# =========================
+# Scripted PLC
+# =========================
+
+class ScriptedPLC(threading.Thread):
+    """Run the RS2 simulator at full speed on the master side of a pty."""
+
+    def __init__(self, master_fd, layers, ack_timeout=30.0):
+        super().__init__(name="scripted-plc", daemon=True)
+        self.simulator = PLCSimulator(FdTransport(master_fd), layers, ack_timeout=ack_timeout,
+                                      retries=0, max_speed=True)
+        self.error = None
+
+    def run(self):
+        try:
+            if not self.simulator.wait_for_ready(self.simulator.ack_timeout):
+                raise RuntimeError("Expected READY (300) first.")
+            if not self.simulator.run(layer_base=0):
+                raise RuntimeError("No ack for the exit command (700).")
+        except Exception as e:
+            self.error = str(e)
+
+
+# =========================
+# Benchmark Runner
+# =========================
+
+def parse_config(spec):
+    """Parse ``key=value,key=value`` into a configuration dict with defaults."""
+    config = {"sink": "png:9", "writer": "async", "flush": 3, "layer_flush": 7, "grabber": 0, "fps": 30, "buffer": 4,
+              "fresh": 0, "pool": 0}
+    for item in filter(None, spec.split(",")):
+        key, _, value = item.partition("=")
+        if key not in config:
+            raise ValueError(f"Unknown benchmark option '{key}'.")
+        config[key] = type(config[key])(value)
+    if config["writer"] not in ("sync", "async", "container"):
+        raise ValueError("writer must be sync, async or container.")
+    config["name"] = spec
+    return config
+
+
+def run_configuration(config, layers, frame_size, result_queue):
+    """Run one full recipe in this (child) process and put the result dict on ``result_queue``."""
+    os.environ["TQDM_DISABLE"] = "1"
+    sys.stdout = open(os.devnull, "w")
+    workdir = tempfile.mkdtemp(prefix="plc_bench_")
+    os.chdir(workdir)
+    try:
+        from .camera_controller import CameraController
+        from .commands import CommandHandler
+        from .image_sinks import make_sink
+        from .image_writer import ImageWriter
+        from .serial_controller import SerialController
+
+        master_fd, slave_fd = os.openpty()
+        serial_comm = SerialController(port_name=os.ttyname(slave_fd))
+        capture = SyntheticCapture("pattern", frame_size, frame_size, fps=config["fps"],
+                                   buffer_depth=config["buffer"])
+        camera = CameraController(use_grabber=bool(config["grabber"]), sink=make_sink(config["sink"]),
+                                  capture=capture, fresh_frames=bool(config["fresh"]), pool_frames=config["pool"],
+                                  pool_reserve=WRITER_PENDING if config["writer"] == "async" else 0)
+        writer = ImageWriter(camera.save_frame, max_pending=WRITER_PENDING) if config["writer"] == "async" else None
+        handler = CommandHandler(serial_comm, camera, product_id="BENCH", username="bench",
+                                 image_writer=writer, use_container=config["writer"] == "container", layers=layers)
+        handler.capture_flush_frames = config["flush"]
+        handler.layer_flush_frames = config["layer_flush"]
+
+        plc = ScriptedPLC(master_fd, layers)
+        plc.start()
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        handler.handle_ready()
+        try:
+            while True:
+                command, layer, section = serial_comm.read_data()
+                if command:
+                    handler.process_incoming_command(command, layer, section, time.monotonic())
+                elif not plc.is_alive():
+                    break
+        except SystemExit:
+            pass  # 700 finishes the writes and exits, as in production
+        drained = time.perf_counter()
+        plc.join(timeout=5)
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        if plc.error:
+            raise RuntimeError(plc.error)
+
+        simulator = plc.simulator
+        latencies = sorted(simulator.latencies)
+        wall = simulator.finished - simulator.started
+        result_queue.put({
+            "config": config["name"],
+            "sections": len(latencies),
+            "acks": simulator.acks,
+            "wall_s": wall,
+            "drain_s": drained - simulator.finished,
+            "throughput": len(latencies) / wall,
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p95": percentile(latencies, 0.95) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": latencies[-1] * 1000,
+            },
+            "cpu_user_s": usage_after.ru_utime - usage_before.ru_utime,
+            "cpu_sys_s": usage_after.ru_stime - usage_before.ru_stime,
+            "peak_rss_mb": usage_after.ru_maxrss / 1024,  # ru_maxrss is KiB on Linux
+            "discarded_frames": camera.discarded_frames,
+        })
+    except Exception as e:
+        result_queue.put({"config": config["name"], "error": str(e)})
+    finally:
+        os.chdir("/")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_benchmark(configs, layers, frame_size=2048, repeats=1, timeout=1800.0):
+    """Run every configuration ``repeats`` times, each in a fresh process, and return the results.
+
+    A run that crashes, or reports nothing within ``timeout`` seconds, is
+    reported as an error instead of hanging the benchmark.
+    """
+    context = multiprocessing.get_context("spawn")  # Fresh interpreter per run for a clean peak RSS
+    results = []
+    for config in configs:
+        runs = []
+        for _ in range(repeats):
+            result_queue = context.Queue()
+            process = context.Process(target=run_configuration, args=(config, layers, frame_size, result_queue))
+            process.start()
+            result = wait_for_result(process, result_queue, timeout)
+            process.join()
+            if "error" in result:
+                print(f"[ERROR] {config['name']}: {result['error']}")
+                break
+            runs.append(result)
+        if runs:
+            result = min(runs, key=lambda run: abs(run["throughput"] - statistics.median(r["throughput"] for r in runs)))
+            result["runs"] = len(runs)
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def wait_for_result(process, result_queue, timeout):
+    """Result dict of a child run, or an error dict if the child dies first or exceeds ``timeout``."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return result_queue.get(timeout=1.0)
+        except queue.Empty:
+            pass
+        if not process.is_alive():
+            try:
+                return result_queue.get(timeout=1.0)  # Put just before a normal exit
+            except queue.Empty:
+                return {"error": f"run process died without a result (exit code {process.exitcode})"}
+        if time.monotonic() > deadline:
+            process.terminate()
+            process.join()
+            return {"error": f"no result within {timeout:.0f} s; run process terminated "
+                             f"(exit code {process.exitcode})"}
+
+
+def print_result(result):
+    latency = result["latency_ms"]
+    print(f"{result['config']:<42}{result['throughput']:>8.2f}/s"
+          f"{latency['p50']:>9.1f}{latency['p95']:>9.1f}{latency['p99']:>9.1f}"
+          f"{result['drain_s']:>8.2f}{result['cpu_user_s'] + result['cpu_sys_s']:>8.1f}"
+          f"{result['peak_rss_mb']:>9.0f}{result['discarded_frames']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control bench",
+                                     description="End-to-end cycle-time benchmark over a pty pair.")
+    parser.add_argument("--config", action="append",
+                        help="Configuration as key=value pairs, e.g. 'sink=png:1,writer=async,flush=0'. "
+                             "Keys: sink, writer (sync/async/container), flush, layer_flush, grabber, fresh, pool, "
+                             "fps, buffer. "
+                             "Repeat for a matrix; defaults to a built-in matrix.")
+    parser.add_argument("--layers", type=int, default=len(LAYERS),
+                        help="Use only the first N layers of the recipe (default: all, 334 sections).")
+    parser.add_argument("--frame-size", type=int, default=2048, help="Square frame edge in pixels.")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per configuration; the median run is kept.")
+    parser.add_argument("--timeout", type=float, default=1800.0,
+                        help="Seconds a single run may take before it is stopped and reported as failed.")
+    parser.add_argument("--json", help="Write the results to this JSON file for comparison across commits.")
+    args = parser.parse_args(argv)
+
+    configs = [parse_config(spec) for spec in (args.config or DEFAULT_CONFIGS)]
+    layers = LAYERS[:args.layers]
+    print(f"Recipe: {sum(layers)} sections, {args.frame_size}x{args.frame_size} frames, {args.repeats} run(s) each")
+    print(f"{'config':<42}{'rate':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'drain':>8}{'cpu s':>8}{'rss MB':>9}{'stale':>8}")
+    results = run_benchmark(configs, layers, args.frame_size, args.repeats, args.timeout)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"layers": layers, "frame_size": args.frame_size, "results": results}, f, indent=2)
+        print(f"[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import time
+
+from .frame_grabber import RING_SIZE, FrameGrabber, device_timestamp
+from .frame_pool import FramePool
+from .image_sinks import make_sink
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# CameraController Class
+# =========================
+
+class CameraController:
+    def __init__(self, device_path='/dev/video0', use_grabber=False, grab_timeout=1.0, sink=None, capture=None,
+                 fresh_frames=False, pool_frames=0, pool_max_mb=None, pool_wait=5.0, pool_reserve=0):
+        import cv2  # Imported here so tools that never open a camera skip the OpenCV import
+
+        #print("Initializing CameraController...")
+        self.device_index = device_path
+        self.sink = sink if sink is not None else make_sink("png:9")
+        self.grab_timeout = grab_timeout
+        self.grabber = None
+        # Pick the first frame exposed after the command instead of flushing a fixed number of frames
+        self.fresh_frames = fresh_frames
+        self.device_clock = True  # Cleared once the backend reports an unusable timestamp
+        self.last_discarded = 0  # Stale frames skipped by the last grab_frame
+        self.discarded_frames = 0
+        self.frame_pool = None  # Preallocated buffers frames are read into; None allocates a frame per read
+        self.pool_wait = pool_wait  # Seconds to wait for a free buffer before the grab fails
+        # ``capture`` lets benchmarks pass any object with the cv2.VideoCapture interface
+        self.camera = capture if capture is not None else cv2.VideoCapture(self.device_index)
+        if not self.camera.isOpened():
+            raise Exception(f"Camera at index {device_path} could not be opened.")
+        #print("Camera initialized.")
+        self.configure_camera()
+        if pool_frames:
+            # ``pool_reserve`` buffers can be held downstream (the writer queue), the grabber ring holds more
+            self.frame_pool = FramePool(self.frame_shape(), pool_frames,
+                                        max_bytes=int(pool_max_mb * 2 ** 20) if pool_max_mb else None,
+                                        reserve=pool_reserve + (RING_SIZE if use_grabber else 0))
+        self.flush_camera_buffer(num_frames=15)
+        if use_grabber:
+            # Frames are read continuously from here on; flushing becomes a no-op
+            self.grabber = FrameGrabber(self.camera, pool=self.frame_pool)
+            self.grabber.start()
+
+    def configure_camera(self):
+        import cv2
+
+        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 2048)
+        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 2048)
+        self.camera.set(cv2.CAP_PROP_FPS, 30)
+        #print("Camera configured.")
+
+    def frame_shape(self):
+        """Return the (height, width, channels) of the configured frames."""
+        import cv2
+
+        return (int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH)), 3)
+
+    def flush_camera_buffer(self, num_frames=15):
+        """Flush the camera buffer to clear stale frames."""
+        #print(f"[INFO] Flushing camera buffer with {num_frames} frames.")
+        if self.grabber is not None or self.fresh_frames:
+            return  # Stale frames are skipped by timestamp in grab_frame
+        for _ in range(num_frames):
+            if not self.camera.grab():  # Dequeue without decoding; the frames are thrown away anyway
+                log.debug("Failed to flush a frame from the camera buffer.")
+
+    def grab_frame(self, newer_than=None):
+        """Read a single frame into memory without saving it.
+
+        In grabber or fresh-frame mode this returns the first frame exposed
+        after ``newer_than`` (defaults to now), waiting at most
+        ``grab_timeout`` seconds; ``last_discarded`` is the number of stale
+        frames skipped on the way.
+        """
+        if self.grabber is not None:
+            if newer_than is None:
+                newer_than = time.monotonic()
+            item = self.grabber.wait_for_frame(newer_than, timeout=self.grab_timeout)
+            self._count_discarded(self.grabber.last_discarded)
+            if item is not None:
+                return item.frame  # Retained for the caller by wait_for_frame
+            log.error("No fresh frame from the grabber thread.")
+            return None
+        if self.fresh_frames:
+            return self._grab_fresh_frame(newer_than if newer_than is not None else time.monotonic())
+        ret, frame = self._read_into_buffer(self.camera.read)
+        if ret:
+            return frame
+        log.error("Failed to capture image.")
+        return None
+
+    def _read_into_buffer(self, read):
+        """Call ``read`` (``read`` or ``retrieve``) with a free pool buffer as the output image."""
+        if self.frame_pool is None:
+            return read()
+        buffer = self.frame_pool.acquire(self.pool_wait)
+        if buffer is None:
+            log.error("No free frame buffer within %s s; all %d are in use.", self.pool_wait, self.frame_pool.count)
+            return False, None
+        ret, frame = read(buffer)
+        if frame is not buffer:
+            self.frame_pool.release(buffer)  # Failed read, or the backend allocated its own array
+        return ret, frame
+
+    def retain_frame(self, frame):
+        """Keep a pooled frame alive for another consumer; no-op for other frames."""
+        if self.frame_pool is not None:
+            self.frame_pool.retain(frame)
+        return frame
+
+    def release_frame(self, frame):
+        """Drop one reference to a pooled frame; the buffer is reused once nothing holds it."""
+        if self.frame_pool is not None:
+            self.frame_pool.release(frame)
+
+    def _grab_fresh_frame(self, newer_than):
+        """Dequeue frames until one was exposed after ``newer_than``, then decode only that one.
+
+        With device timestamps the exposure time is known directly. Without
+        them a frame counts as fresh when ``grab()`` started after
+        ``newer_than`` and had to wait for the sensor, i.e. the driver queue
+        was already empty.
+        """
+        import cv2
+
+        deadline = time.monotonic() + self.grab_timeout
+        min_wait = 0.5 / (self.camera.get(cv2.CAP_PROP_FPS) or 30)
+        discarded = 0
+        while time.monotonic() < deadline:
+            started = time.monotonic()
+            if not self.camera.grab():
+                log.error("Failed to capture image.")
+                break
+            read_at = time.monotonic()
+            timestamp = device_timestamp(self.camera, read_at) if self.device_clock else None
+            if timestamp is None and self.device_clock:
+                self.device_clock = False
+                log.warning("Camera reports no usable frame timestamps; using host time.")
+            if timestamp is not None:
+                fresh = timestamp > newer_than
+            else:
+                fresh = started >= newer_than and read_at - started >= min_wait
+            if fresh:
+                self._count_discarded(discarded)
+                ret, frame = self._read_into_buffer(self.camera.retrieve)
+                if ret:
+                    return frame
+                log.error("Failed to capture image.")
+                return None
+            discarded += 1
+        else:
+            log.error("No fresh frame within the grab timeout.")
+        self._count_discarded(discarded)
+        return None
+
+    def _count_discarded(self, count):
+        self.last_discarded = count
+        self.discarded_frames += count
+
+    def save_frame(self, save_path, frame):
+        """Encode and write a frame that was already grabbed through the configured sink."""
+        return self.sink.write(save_path, frame)
+
+    def capture_image(self, save_path, newer_than=None):
+        frame = self.grab_frame(newer_than)
+        if frame is None:
+            return False
+        try:
+            return self.save_frame(save_path, frame)
+        except Exception as e:
+            log.error("Failed to save image %s: %s", save_path, e)
+            return False
+        finally:
+            self.release_frame(frame)
+
+    def release(self):
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
+        self.camera.release()
+        if self.discarded_frames:
+            log.info("%d stale frame(s) discarded by timestamp.", self.discarded_frames)
+        if self.frame_pool is not None:
+            log.info(self.frame_pool.summary())
+        log.info("Camera resource released.")
+
+
+# =========================
+# DummyCameraController Class
+# =========================
+
+class DummyCameraController:
+    """Camera stand-in for the virtual PLC setup: nothing is grabbed or written."""
+
+    def __init__(self, device_path=0, sink=None, **_):
+        self.device_index = device_path
+        self.sink = sink if sink is not None else make_sink("png:9")
+        self.grabber = None
+        self.frame_count = 0
+        log.info("Camera initialized (Dummy Mode).")
+
+    def configure_camera(self):
+        pass
+
+    def frame_shape(self):
+        return (1, 1, 1)
+
+    def flush_camera_buffer(self, num_frames=0):
+        """Simulate flushing the camera buffer."""
+        pass
+
+    def grab_frame(self, newer_than=None):
+        self.frame_count += 1
+        return self.frame_count  # Placeholder object; save_frame never encodes it
+
+    def save_frame(self, save_path, frame):
+        log.debug("Captured dummy image %s at: %s", frame, save_path)
+        return True  # Always indicate success
+
+    def capture_image(self, save_path, newer_than=None):
+        return self.save_frame(save_path, self.grab_frame(newer_than))
+
+    def retain_frame(self, frame):
+        return frame
+
+    def release_frame(self, frame):
+        pass
+
+    def release(self):
+        log.info("Camera resource released (Dummy Mode).")
@@ -0,0 +1,179 @@
+import csv
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# Capture Tracing
+# =========================
+
+class CaptureSpan:
+    """Timeline of one capture.
+
+    ``mark`` closes the stage that just ran, ``count`` adds to a per-capture
+    counter and ``note`` records a measured value (e.g. a quality score).
+    """
+
+    __slots__ = ("tracer", "layer", "section", "start", "last", "stages", "counts", "values")
+
+    def __init__(self, tracer, layer, section, start):
+        self.tracer = tracer
+        self.layer = layer
+        self.section = section
+        self.start = start
+        self.last = start
+        self.stages = []
+        self.counts = {}
+        self.values = {}
+
+    def mark(self, stage):
+        now = time.monotonic()
+        self.stages.append((stage, self.last - self.start, now - self.last))
+        self.last = now
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def note(self, name, value):
+        self.values[name] = value
+
+    @property
+    def total(self):
+        """Cycle time: seconds from the 400 command to the last mark (the ack)."""
+        return self.last - self.start
+
+    def end(self, status):
+        self.tracer._finish(self, status)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+    def count(self, name, value):
+        pass
+
+    def note(self, name, value):
+        pass
+
+    def end(self, status):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Tracer used when tracing is off; every call is a no-op."""
+
+    def begin(self, layer, section, received_at=None):
+        return NULL_SPAN
+
+    def close(self):
+        pass
+
+
+class CaptureTracer:
+    """Record per-stage monotonic timings for every capture.
+
+    Each finished capture is appended to ``trace_path`` (JSONL, or CSV when
+    the path ends in ``.csv``) and kept in memory for the p50/p95/p99
+    summary printed by ``close``.
+    """
+
+    def __init__(self, trace_path=None):
+        self.trace_path = trace_path
+        self._lock = threading.Lock()
+        self._file = None
+        self._csv = None
+        self.stage_durations = defaultdict(list)
+        self.layer_totals = defaultdict(list)
+        self.counters = defaultdict(int)
+        self.count = 0
+        if trace_path:
+            self._file = open(trace_path, "w", newline="")
+            if trace_path.endswith(".csv"):
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(["layer", "section", "status", "stage", "offset_ms", "duration_ms"])
+
+    def begin(self, layer, section, received_at=None):
+        """Start a capture timeline; ``received_at`` is when the 400 command arrived."""
+        span = CaptureSpan(self, layer, section, received_at if received_at is not None else time.monotonic())
+        if received_at is not None:
+            span.mark("dispatch")
+        return span
+
+    def _finish(self, span, status):
+        total = span.total
+        with self._lock:
+            self.count += 1
+            for stage, _, duration in span.stages:
+                self.stage_durations[stage].append(duration)
+            self.stage_durations["total"].append(total)
+            self.layer_totals[span.layer].append(total)
+            for name, value in span.counts.items():
+                self.counters[name] += value
+            if self._csv is not None:
+                for stage, offset, duration in span.stages:
+                    self._csv.writerow([span.layer, span.section, status, stage,
+                                        f"{offset * 1000:.3f}", f"{duration * 1000:.3f}"])
+                for name, value in list(span.counts.items()) + list(span.values.items()):
+                    self._csv.writerow([span.layer, span.section, status, name, "", value])
+            elif self._file is not None:
+                self._file.write(json.dumps({
+                    "layer": span.layer,
+                    "section": span.section,
+                    "status": status,
+                    "start": span.start,
+                    "stages": {stage: round(duration * 1000, 3) for stage, _, duration in span.stages},
+                    "total_ms": round(total * 1000, 3),
+                    "counts": span.counts,
+                    "values": span.values,
+                }) + "\n")
+
+    def summary(self):
+        """Return the p50/p95/p99 table per stage and per layer as text."""
+        lines = [f"Capture trace: {self.count} capture(s)",
+                 f"{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for stage, durations in self.stage_durations.items():
+            lines.append(_summary_row(stage, durations))
+        lines.append(f"{'layer':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for layer in sorted(self.layer_totals, key=lambda value: (value is None, value)):
+            lines.append(_summary_row(str(layer), self.layer_totals[layer]))
+        for name, value in self.counters.items():
+            lines.append(f"{name}: {value} total, {value / self.count:.2f} per capture")
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.count:
+            log.info("Capture trace summary:\n%s", self.summary())
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _summary_row(name, durations):
+    values = sorted(durations)
+    return (f"{name:<14}{len(values):>7}"
+            f"{percentile(values, 0.50) * 1000:>10.1f}"
+            f"{percentile(values, 0.95) * 1000:>10.1f}"
+            f"{percentile(values, 0.99) * 1000:>10.1f}")
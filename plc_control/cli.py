@@ -0,0 +1,151 @@
+import argparse
+import sys
+import time
+
+
+# =========================
+# Run Command
+# =========================
+
+def run(args):
+    """Interactive controller: type 'ready' to start a product, 'exit' to quit."""
+    from .config import load_config
+    from .logs import setup_logging
+    from .station import Station
+
+    overrides = {}
+    if args.port:
+        overrides["serial"] = {"port": args.port}
+    if args.parity:
+        overrides.setdefault("serial", {})["parity"] = args.parity
+    if args.output:
+        overrides["output"] = {"root": args.output}
+    if args.record:
+        overrides["record_file"] = args.record
+    if args.log_file:
+        overrides["logging"] = {"file": args.log_file}
+    if args.metrics_port:
+        overrides["metrics"] = {"enabled": True, "port": args.metrics_port}
+    if args.synthetic:
+        overrides["camera"] = {"backend": "synthetic", "synthetic": {"source": args.synthetic}}
+    config = load_config(args.config, args.variant, overrides)
+    setup_logging(config["logging"])
+
+    station = Station(config)
+    handler = None
+    controller = None
+    recorder = None
+    try:
+        station.open()
+        handler = station.create_handler(args.product_id, args.username)
+        if config["record_file"]:
+            from .session_recorder import SessionRecorder
+
+            recorder = SessionRecorder(config["record_file"], metadata={
+                "variant": config["variant"], "product_id": handler.product_id, "username": handler.username,
+                "layers": handler.layers, "frame_shape": station.camera.frame_shape(),
+            })
+            recorder.attach(station.serial, station.camera)
+        if args.use_async:
+            from .async_controller import AsyncController
+
+            controller = AsyncController(station.serial, handler)
+
+        print("Type 'ready' to initialize or 'exit' to quit.")
+
+        while True:
+            user_input = input("Enter command: ").strip().lower()
+            if user_input == 'ready':
+                handler.handle_ready()  # Send 300 and initialize directory
+                if controller is not None:
+                    import asyncio
+
+                    asyncio.run(controller.run())
+                    break
+                while True:
+                    command, layer, section = station.serial.read_data()
+                    if command:
+                        received_at = time.monotonic()
+                        handler.process_incoming_command(command, layer, section, received_at)
+            elif user_input == 'exit':
+                print("[INFO] Exiting program as requested.")
+                break
+            else:
+                print("[WARNING] Unknown command. Type 'ready' to initialize or 'exit' to quit.")
+
+    except KeyboardInterrupt:
+        print("\n Terminates halfway")
+    except Exception as e:
+        print(f"[ERROR] An unexpected error occurred: {e}")
+    finally:
+        if controller is not None:
+            controller.close()
+        if handler is not None:
+            handler.finish_writes()
+        if recorder is not None:
+            recorder.close()
+        station.close()
+        if handler is not None:
+            handler.close_progress()
+
+
+def add_run_parser(subparsers):
+    parser = subparsers.add_parser("run", help="Run the capture controller for one station.")
+    parser.add_argument("--config", help="Station config file (JSON).")
+    parser.add_argument("--variant", help="Controller variant: merged, plc-counting, python-counting or virtual-plc.")
+    parser.add_argument("--port", help="Serial port of the PLC, overrides the config file.")
+    parser.add_argument("--parity", choices=["N", "E", "O"], help="Serial parity, overrides the config file.")
+    parser.add_argument("--output", help="Root directory for captured images (default: current directory).")
+    parser.add_argument("--synthetic", metavar="SOURCE",
+                        help="Use the synthetic camera: pattern, noise or a directory of images.")
+    parser.add_argument("--product-id", help="Product ID; asked for interactively when omitted.")
+    parser.add_argument("--username", help="Operator name; asked for interactively when omitted.")
+    parser.add_argument("--record", metavar="PATH", help="Record serial traffic and frames for 'plc-control replay'.")
+    parser.add_argument("--log-file", metavar="PATH", help="Also write the log to PATH as JSON lines.")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics.")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Use the asyncio controller instead of the blocking read loop.")
+    parser.set_defaults(func=run)
+
+
+# =========================
+# Main Function
+# =========================
+
+# Tools that parse their own arguments; the module is only imported when chosen
+TOOLS = {
+    "daemon": ("station_daemon", "Warm-standby station daemon and its control client."),
+    "multi": ("multi_station", "Drive several PLC/camera stations from one process."),
+    "simulate": ("simulator", "Handshake-aware virtual PLC."),
+    "bench": ("bench_cycle", "End-to-end cycle-time benchmark over a pty pair."),
+    "parser-bench": ("plc_protocol", "Replay a synthetic PLC byte stream through the frame parser."),
+    "container": ("session_container", "Inspect or export a session container."),
+    "replay": ("session_recorder", "Replay a recorded session through the command handler."),
+    "manifest": ("manifest", "Query the batch and image manifest of a station."),
+}
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] in TOOLS:
+        import importlib
+
+        module = importlib.import_module(f".{TOOLS[argv[0]][0]}", __package__)
+        return module.main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="plc-control", description="PLC-driven camera capture station.")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    add_run_parser(subparsers)
+    for name, (_, help_text) in TOOLS.items():
+        subparsers.add_parser(name, help=help_text, add_help=False)
+
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 1
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,538 @@
+import os
+import time
+
+from .capture_trace import NULL_SPAN, NullTracer
+from .image_commit import ImageCommitter
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+LAYERS = [1, 8, 12, 18, 24, 30, 36, 40, 45, 60, 60]  # Sections per layer, 334 in total
+
+
+# =========================
+# CommandHandler Class
+# =========================
+
+class CommandHandler:
+    """PLC handshake for one product run (the merged controller).
+
+    Images are named ``{product_id}-layerNN-sectionNN`` inside
+    ``{output_root}/{product_id}_{username}``. Subclasses change the naming
+    and folder layout through ``setup_output`` and ``save_path_for``.
+    """
+
+    def __init__(self, serial_controller, camera_controller, product_id=None, username=None, image_writer=None,
+                 use_container=False, tracer=None, output_root=None, layers=None):
+        self.serial = serial_controller
+        self.camera = camera_controller
+        self.tracer = tracer if tracer is not None else NullTracer()
+        self.image_writer = image_writer  # Optional background encoder; None keeps synchronous writes
+        self.use_container = use_container  # Store frames in one memory-mapped file instead of loose images
+        self.container = None
+        self.output_root = output_root if output_root is not None else os.getcwd()
+        self.layers = list(layers) if layers is not None else list(LAYERS)
+        self.image_count = 1
+        self.current_layer = None  # Track layer changes
+        self.total_bar = None
+        self.progress_label = ""  # Prefix for the progress bars, e.g. the station name
+        self.progress_position = 0  # First terminal row of this handler's progress bars
+        self.ready_flush_frames = 8  # Frames discarded after READY
+        self.layer_flush_frames = 7  # Frames discarded at the start of each layer
+        self.capture_flush_frames = 3  # Frames discarded before every capture
+        self.settle_time = 0.0  # Seconds to wait for the stage before every capture
+        self.layer_offset = 0  # Added to the layer word received from the PLC
+        self.quality_gate = None  # Optional QualityGate; failing frames are regrabbed, then failed with 600
+        self.preview_writer = None  # Optional PreviewWriter fed from the in-memory frame after the ack
+        self.duplicate_detector = None  # Optional DuplicateDetector comparing each frame with the previous section
+        self.mosaic_builder = None  # Optional MosaicBuilder assembling each layer from the in-memory frames
+        self.manifest = None  # Optional Manifest indexing batches and written images
+        self.batch_id = None  # Manifest ID of the current run
+        self.resume = False  # Keep a capture journal and acknowledge sections it already holds without capturing
+        self.journal_sync_every = 16  # Journal records per fsync
+        self.journal_sync_seconds = 0.5  # Longest time between journal fsyncs
+        self.journal = None
+        self.metrics = None  # Optional StationMetrics counting acks and unknown commands
+        self.committer = ImageCommitter()  # Resolves each image write once it is durable under the fsync policy
+
+        self.product_id = product_id
+        self.username = username
+        self.output_dir = None
+        self.setup_output()
+
+    def setup_output(self):
+        """Ask for the product details if needed and create the output directory."""
+        # Allow parameter-based or manual input
+        if not self.product_id:
+            self.product_id = input("Enter Product ID (12 characters): ").strip()
+        if not self.username:
+            self.username = input("Enter Username: ").strip()
+
+        # Ensure both product_id and username are valid
+        if not self.product_id or not self.username:
+            raise ValueError("Both Product ID and Username must be provided.")
+
+        # Set the output directory after initializing product_id and username
+        self.output_dir = os.path.join(self.output_root, f"{self.product_id}_{self.username}")
+        self.initialize_output_directory()
+
+    def initialize_output_directory(self):
+        """Create the output directory."""
+        if not self.output_dir:
+            raise ValueError("Output directory is not set.")
+        os.makedirs(self.output_dir, exist_ok=True)
+        log.info("Output directory created: %s", self.output_dir)
+
+    def save_path_for(self, layer, section):
+        """Return the save path (without extension) for (layer, section)."""
+        layer_number = self.layer_number(layer)
+        return os.path.join(self.output_dir, f"{self.product_id}-layer{layer_number:02d}-section{section:02d}")
+
+    def layer_number(self, layer):
+        """1-based layer number used in file names for the layer word received from the PLC."""
+        return layer + 1
+
+    def handle_ready(self):
+        """Send READY signal (300) to PLC and initialize the output directory."""
+        from tqdm import tqdm
+
+        if not self.serial.serial_port or not self.serial.serial_port.is_open:
+            raise Exception("[ERROR] Serial port is not open. Cannot send READY signal.")
+
+        self.serial.write_data(300)  # Send 300 to PLC
+        time.sleep(0.1)
+        self.camera.flush_camera_buffer(num_frames=self.ready_flush_frames)
+        if self.duplicate_detector is not None:
+            self.duplicate_detector.reset()  # Nothing to compare the first section with
+        if self.manifest is not None and self.batch_id is None:
+            self.batch_id = self.resumed_batch()
+            if self.batch_id is None:
+                self.batch_id = self.manifest.start_batch(self.product_id, self.username, output_dir=self.output_dir)
+        if self.resume and self.journal is None:
+            self.open_journal()
+
+        # Initialize progress bars
+        self.total_images = sum(self.layers)  # 334 images per product
+        self.total_bar = tqdm(total=self.total_images, desc=f"{self.progress_label}Total Progress", unit="image",
+                              position=self.progress_position, leave=True)
+
+        if self.use_container and self.container is None:
+            from .session_container import EXTENSION, SessionContainer
+
+            container_path = os.path.join(self.output_dir, f"{self.product_id}{EXTENSION}")
+            if self.journal is not None and self.journal.completed and os.path.exists(container_path):
+                self.container = SessionContainer.open(container_path, mode="r+")
+                log.info("Session container reopened: %s", container_path)
+            else:
+                self.container = SessionContainer.create(
+                    container_path, self.total_images, self.camera.frame_shape(), product_id=self.product_id
+                )
+                log.info("Session container preallocated: %s", container_path)
+
+    def resumed_batch(self):
+        """Manifest ID of the interrupted run being resumed in the output directory, else None."""
+        from .journal import unfinished_journal
+
+        if not self.resume or not unfinished_journal(self.output_dir):
+            return None
+        batch = self.manifest.latest_batch(self.output_dir)
+        return batch["id"] if batch is not None else None
+
+    def open_journal(self):
+        """Open the capture journal of the output directory, reloading it if the last run was interrupted."""
+        from .journal import JOURNAL_NAME, CaptureJournal
+
+        self.journal = CaptureJournal(os.path.join(self.output_dir, JOURNAL_NAME), self.journal_sync_every,
+                                      self.journal_sync_seconds)
+        if self.journal.completed:
+            log.info("Resuming %s: %d section(s) already captured will be acknowledged without capturing.",
+                     self.product_id, len(self.journal.completed))
+
+    def handle_capture(self, layer, section, received_at=None):
+        """Capture and save an image with a specific naming format.
+
+        ``received_at`` is the monotonic time the 400 command arrived; in
+        grabber mode only frames read after it are accepted.
+        """
+        if self.resume_section(layer, section, received_at):
+            return
+        span = self.tracer.begin(layer, section, received_at)
+        save_path = self.prepare_capture(layer, section, span)
+        frame = self.acquire_frame(layer, section, received_at, span)
+        captured = frame is not None and self.store_frame(layer, section, save_path, frame, received_at)
+        span.mark("store")
+        self.acknowledge_capture(captured)
+        span.mark("ack")
+        span.end(500 if captured else 600)
+        if captured:
+            self.queue_preview(layer, section, save_path, frame)
+        if frame is not None:
+            self.camera.release_frame(frame)  # Consumers that still need it hold their own reference
+
+    def reject_capture(self):
+        """Answer a capture command that arrived without layer and section (a 2-byte frame) with FAILED."""
+        if self.metrics is not None:
+            self.metrics.unknown_command()
+        log.warning("Capture command without layer and section received; answering 600.")
+        self.acknowledge_capture(False)
+
+    def resume_section(self, layer, section, received_at=None):
+        """Acknowledge a section the journal already holds; returns False if it still has to be captured."""
+        if self.journal is None or not self.journal.done(self.layer_number(layer), section):
+            return False
+        span = self.tracer.begin(layer, section, received_at)
+        span.count("resumed", 1)
+        self.acknowledge_capture(True)
+        span.mark("ack")
+        span.end(500)
+        return True
+
+    def prepare_capture(self, layer, section, span=NULL_SPAN):
+        """Flush stale frames and return the save path for (layer, section)."""
+        # Detect new layer transition
+        if layer != self.current_layer:
+            self.on_layer_change(layer)
+            self.committer.seal()  # Group commit of the previous layer under the "layer" fsync policy
+            self.camera.flush_camera_buffer(num_frames=self.layer_flush_frames)  # Clear stale frames at layer start
+            self.current_layer = layer  # Update current layer
+            span.mark("layer_flush")
+
+        save_path = self.camera.sink.path_for(self.save_path_for(layer, section))
+
+        if self.settle_time:
+            time.sleep(self.settle_time)  # Wait for mechanical stability
+        self.camera.flush_camera_buffer(num_frames=self.capture_flush_frames)
+        span.mark("flush")
+        return save_path
+
+    def acquire_frame(self, layer, section, received_at=None, span=NULL_SPAN):
+        """Grab the frame for (layer, section) and run the quality and duplicate checks.
+
+        A frame rejected by the quality gate is regrabbed up to
+        ``quality_gate.retries`` times, then the section fails (None). A frame
+        that hashes like the previous section's is regrabbed if the duplicate
+        detector says so and is otherwise kept but flagged.
+        """
+        frame = self.camera.grab_frame(received_at)
+        span.mark("grab")
+        span.count("discarded_frames", getattr(self.camera, "last_discarded", 0))
+        gate = self.quality_gate
+        detector = self.duplicate_detector
+        if frame is None or not hasattr(frame, "shape") or (gate is None and detector is None):
+            return frame
+
+        attempt = 0
+        while True:
+            retake = None
+            if gate is not None:
+                result = gate.check(frame, layer, section, attempt)
+                span.note("sharpness", round(result.sharpness, 2))
+                span.note("clipped", round(result.dark + result.bright, 5))
+                span.mark("quality")
+                if not result.passed:
+                    if attempt >= gate.retries:
+                        log.warning("Layer %s section %s rejected after %d grab(s): %s", layer, section, attempt + 1,
+                                    result.reason, extra={"layer": layer, "section": section})
+                        self.camera.release_frame(frame)
+                        return None
+                    retake = "quality_retakes"
+            if retake is None and detector is not None:
+                duplicate, distance, value = detector.check(frame)
+                if distance is not None:
+                    span.note("hash_distance", distance)
+                span.mark("hash")
+                if duplicate and detector.action == "regrab" and attempt < detector.retries:
+                    retake = "duplicate_retakes"
+                else:
+                    if duplicate:
+                        log.warning("Layer %s section %s looks like the previous section (hash distance %s).",
+                                    layer, section, distance, extra={"layer": layer, "section": section})
+                        span.count("duplicates", 1)
+                    detector.accept(value, duplicate)
+            if retake is None:
+                return frame
+            attempt += 1
+            span.count(retake, 1)
+            self.camera.release_frame(frame)
+            frame = self.camera.grab_frame(time.monotonic())
+            span.mark("regrab")
+            if frame is None:
+                return None
+
+    def on_layer_change(self, layer):
+        """Called before the first capture of a new layer."""
+        pass
+
+    def queue_preview(self, layer, section, save_path, frame):
+        """Hand a captured frame to the background preview writer and mosaic builder, if any."""
+        if not hasattr(frame, "shape"):
+            return
+        layer_number = self.layer_number(layer)
+        # Both queue a downscaled copy, so these optional consumers never pin a pooled buffer
+        if self.preview_writer is not None:
+            self.preview_writer.submit(self.output_dir, save_path, layer_number, section, frame)
+        if self.mosaic_builder is not None:
+            sections = self.layers[layer_number - 1] if 0 < layer_number <= len(self.layers) else None
+            self.mosaic_builder.submit(self.output_dir, layer_number, section, sections, frame)
+
+    def store_frame(self, layer, section, save_path, frame, received_at=None):
+        """Hand a grabbed frame to the container, the background writer or the sink."""
+        captured_at = time.monotonic()
+        if self.container is not None:
+            # Copy straight into the preallocated slot; no encode, no extra file
+            try:
+                self.container.write(self.layer_number(layer), section, frame)
+            except Exception as e:
+                log.error("Failed to store layer %s section %s in container: %s", layer, section, e)
+                return False
+            self.record_image(layer, section, self.container.path, None, received_at, captured_at)
+            return True
+        commit = self.committer.begin(save_path)
+        if self.manifest is not None or self.journal is not None:
+            def on_durable(future):
+                if future.result():
+                    self.record_image(layer, section, save_path, future.result(), received_at, captured_at)
+            commit.future.add_done_callback(on_durable)
+        if self.image_writer is not None:
+            # Ack as soon as the frame is in memory; encoding happens in the background
+            self.camera.retain_frame(frame)
+
+            def on_done(result):
+                self.camera.release_frame(frame)  # Encoded; the buffer can be reused before the fsync
+                commit.written(result)
+            try:
+                self.image_writer.submit(save_path, frame, layer, section, on_done)
+            except Exception:
+                on_done(False)
+                raise
+            return True
+        try:
+            result = self.camera.save_frame(save_path, frame)
+        except Exception as e:
+            log.error("Failed to save image %s: %s", save_path, e)
+            result = False
+        commit.written(result)  # Syncs here under the "file" policy, so the ack follows a durable write
+        return bool(result)
+
+    def record_image(self, layer, section, save_path, result, received_at=None, captured_at=None):
+        """Add a completed write to the manifest and the journal; ``result`` is the sink's SinkResult, if any."""
+        layer_number = self.layer_number(layer)
+        if self.manifest is not None:
+            self.manifest.record_image(self.batch_id, self.product_id, layer_number, section, save_path,
+                                       received_at, captured_at, getattr(result, "num_bytes", None),
+                                       getattr(result, "checksum", None))
+        if self.journal is not None:
+            self.journal.record(layer_number, section, save_path)
+
+    def acknowledge_capture(self, captured):
+        """Send DONE (500) or FAILED (600) to the PLC for the current section."""
+        if self.metrics is not None:
+            self.metrics.ack(500 if captured else 600)
+        if captured:
+            self.serial.write_data(500)  # DONE signal for normal capture completion
+            self.image_count += 1
+            self.total_bar.update(1)  # Update progress bar
+        else:
+            self.serial.write_data(600)  # Treat as a failed capture
+
+    def finish_writes(self, completed=False):
+        """Wait for background writes, report any sections that failed to save and close the trace.
+
+        ``completed`` means the PLC ended the product (700); otherwise the
+        journal is left open-ended so the next run with this product resumes.
+        """
+        tracer, self.tracer = self.tracer, NullTracer()
+        tracer.close()
+        gate, self.quality_gate = self.quality_gate, None
+        if gate is not None:
+            gate.close()
+        previews, self.preview_writer = self.preview_writer, None
+        if previews is not None:
+            previews.close()
+        mosaics, self.mosaic_builder = self.mosaic_builder, None
+        if mosaics is not None:
+            mosaics.close()
+        detector, self.duplicate_detector = self.duplicate_detector, None
+        if detector is not None:
+            detector.close()
+        container, self.container = self.container, None
+        if container is not None:
+            log.info("%d image(s) stored in %s", len(container), container.path)
+            container.close()
+        writer, self.image_writer = self.image_writer, None
+        if writer is not None:
+            writer.close()
+            writer.report()
+            log.info(self.camera.sink.summary())
+        self.committer.close()  # Last group commit; resolves the remaining manifest and journal records
+        journal, self.journal = self.journal, None
+        if journal is not None:
+            journal.close(finished=completed)
+        manifest, self.manifest = self.manifest, None
+        if manifest is not None:
+            manifest.close()  # After the writer, so every completed image is recorded
+
+    def close_progress(self):
+        if self.total_bar is not None:
+            self.total_bar.close()
+
+    def process_incoming_command(self, command, layer, section, received_at=None):
+        """Process incoming commands and capture images based on them."""
+        if command == 700:  # Exit command
+            log.info("Exit command received. Terminating program.")
+            self.serial.write_data(700)
+            if self.metrics is not None:
+                self.metrics.ack(700)
+            self.finish_writes(completed=True)
+            self.camera.release()
+            self.serial.close()
+            exit(0)
+        elif command == 400:  # Capture command
+            if layer is None or section is None:
+                self.reject_capture()
+                return
+            self.handle_capture(layer + self.layer_offset, section, received_at)
+        else:
+            if self.metrics is not None:
+                self.metrics.unknown_command()
+            log.warning("Unknown command received: %s", command)
+
+
+# =========================
+# BatchCommandHandler Class
+# =========================
+
+class BatchCommandHandler(CommandHandler):
+    """Handshake of the Split controllers: ``Batch_N/Layer_k/image_N`` output.
+
+    ``layer_base`` is the layer number the PLC uses for the first layer (0
+    for PLCCounting/pythonCounting, 1 for the virtual PLC).
+    """
+
+    def __init__(self, serial_controller, camera_controller, layer_base=0, **kwargs):
+        self.layer_base = layer_base
+        self.layer_folders = []
+        self.layer_bar = None
+        self.current_section_count = 0
+        kwargs.setdefault("product_id", "batch")
+        kwargs.setdefault("username", "-")
+        super().__init__(serial_controller, camera_controller, **kwargs)
+
+    def setup_output(self):
+        pass  # The batch directory is only created at READY
+
+    def handle_ready(self):
+        """Send READY signal and initialize folder structure."""
+        self.initialize_folders()
+        super().handle_ready()
+
+    def initialize_folders(self):
+        """Create directory structure for the session."""
+        self.output_dir = self._create_batch_directory()
+        self.product_id = os.path.basename(self.output_dir)
+        self._create_layer_folders()
+
+    def _create_batch_directory(self):
+        if self.resume:
+            dir_name = self._interrupted_batch()
+            if dir_name is not None:
+                log.info("Continuing interrupted batch %s", dir_name)
+                return dir_name
+        if self.manifest is None:
+            batch_number = 1
+            while os.path.exists(os.path.join(self.output_root, f"Batch_{batch_number}")):
+                batch_number += 1
+            dir_name = os.path.join(self.output_root, f"Batch_{batch_number}")
+            os.makedirs(dir_name, exist_ok=True)
+            return dir_name
+
+        # The manifest hands out batch numbers atomically; folders from before the manifest existed are
+        # skipped once by starting after the highest one
+        first_id = 1
+        while True:
+            self.batch_id = self.manifest.start_batch(username=self.username, first_id=first_id)
+            dir_name = os.path.join(self.output_root, f"Batch_{self.batch_id}")
+            try:
+                os.makedirs(dir_name)
+            except FileExistsError:
+                self.manifest.discard_batch(self.batch_id)
+                first_id = max(self.batch_id, _highest_batch(self.output_root)) + 1
+                continue
+            self.manifest.update_batch(self.batch_id, product_id=os.path.basename(dir_name), output_dir=dir_name)
+            return dir_name
+
+    def _interrupted_batch(self):
+        """Directory of the latest batch if its run ended without a 700, else None."""
+        from .journal import unfinished_journal
+
+        if self.manifest is not None:
+            batch = self.manifest.latest_batch()
+            if batch is None or not batch["output_dir"] or not unfinished_journal(batch["output_dir"]):
+                return None
+            self.batch_id = batch["id"]
+            return batch["output_dir"]
+        if not os.path.isdir(self.output_root):
+            return None
+        dir_name = os.path.join(self.output_root, f"Batch_{_highest_batch(self.output_root)}")
+        return dir_name if unfinished_journal(dir_name) else None
+
+    def _create_layer_folders(self):
+        self.layer_folders = []
+        for i in range(1, len(self.layers) + 1):
+            layer_folder = os.path.join(self.output_dir, f"Layer_{i}")
+            os.makedirs(layer_folder, exist_ok=True)
+            self.layer_folders.append(layer_folder)
+
+    def layer_number(self, layer):
+        return layer - self.layer_base + 1
+
+    def save_path_for(self, layer, section):
+        layer_index = layer - self.layer_base
+        # Ensure folder for the layer exists
+        while len(self.layer_folders) <= layer_index:
+            layer_folder = os.path.join(self.output_dir, f"Layer_{len(self.layer_folders) + 1}")
+            os.makedirs(layer_folder, exist_ok=True)
+            self.layer_folders.append(layer_folder)
+        save_path = os.path.join(self.layer_folders[layer_index], f"image_{self.image_count}")
+        while self.journal is not None and self.journal.holds(save_path):
+            # Resumed batch: a section that failed before the crash must not take the name of a later one
+            self.image_count += 1
+            save_path = os.path.join(self.layer_folders[layer_index], f"image_{self.image_count}")
+        return save_path
+
+    def on_layer_change(self, layer):
+        from tqdm import tqdm
+
+        if self.layer_bar is not None:
+            log.info("Layer %s complete.", self.current_layer)
+            self.layer_bar.close()
+        self.current_section_count = 0
+        layer_index = layer - self.layer_base
+        total_sections_for_layer = self.layers[layer_index] if 0 <= layer_index < len(self.layers) else None
+        self.layer_bar = tqdm(total=total_sections_for_layer,
+                              desc=f"{self.progress_label}Layer {layer_index + 1} Progress",
+                              unit="image", position=self.progress_position + 1, leave=True)
+
+    def acknowledge_capture(self, captured):
+        if captured:
+            self.current_section_count += 1
+            if self.layer_bar is not None:
+                self.layer_bar.update(1)
+        super().acknowledge_capture(captured)
+
+    def close_progress(self):
+        if self.layer_bar is not None:
+            self.layer_bar.close()
+        super().close_progress()
+
+
+def _highest_batch(output_root):
+    """Highest N of the ``Batch_N`` folders in ``output_root``."""
+    numbers = [0]
+    for name in os.listdir(output_root):
+        prefix, _, number = name.partition("_")
+        if prefix == "Batch" and number.isdigit():
+            numbers.append(int(number))
+    return max(numbers)
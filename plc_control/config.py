@@ -0,0 +1,198 @@
+import copy
+import json
+import os
+
+
+# =========================
+# Station Configuration
+# =========================
+#
+# A station config is a JSON object; any key left out falls back to the
+# defaults of the selected variant. Example:
+#
+#   {
+#     "variant": "merged",
+#     "serial": {"port": "/dev/ttyUSB0", "parity": "O"},
+#     "camera": {"backend": "opencv", "device": "/dev/video0", "grabber": true},
+#     "output": {"root": "/data/inspection", "sink": "png:3", "writer": "async"},
+#     "trace_file": "trace.jsonl"
+#   }
+
+BASE_CONFIG = {
+    "variant": "merged",
+    "handler": "product",  # "product": {product_id}_{user}/..., "batch": Batch_N/Layer_k/image_N
+    "serial": {"port": "/dev/ttyUSB0", "baudrate": 9600, "parity": "O", "timeout": 1},
+    "camera": {
+        "backend": "opencv",  # "opencv", "synthetic" (no hardware) or "dummy" (no frames at all)
+        "device": "/dev/video0",
+        "grabber": True,
+        "grab_timeout": 1.0,
+        "fresh_frames": True,  # Select the first frame exposed after the 400 by timestamp instead of flushing
+        "synthetic": {"source": "pattern", "width": 2048, "height": 2048, "fps": 30, "buffer_depth": 4},
+        # Preallocated frame buffers (0 = allocate per read); max_mb caps the count, wait is the back-pressure limit
+        "pool": {"frames": 0, "max_mb": None, "wait": 5.0},
+    },
+    "output": {
+        "root": None,
+        "sink": "png:9",
+        "writer": "async",
+        "writer_workers": 2,
+        "writer_pending": 8,
+        "manifest": "manifest.sqlite3",  # Index of batches and images, relative to the root; null disables it
+        "fsync": "none",  # When an image counts as durable: "none", "file" or "layer" (group commit)
+    },
+    "flush": {"ready": 8, "layer": 7, "capture": 3},  # Frames flushed, only with fresh_frames and grabber off
+    "layers": [1, 8, 12, 18, 24, 30, 36, 40, 45, 60, 60],
+    "settle_time": 0.0,
+    "layer_base": 0,
+    "layer_offset": 0,
+    "confirm_saved": False,  # Sync writes are fsynced before the ack (fsync "file")
+    "trace_file": None,
+    "quality": {
+        "enabled": False,
+        "min_sharpness": 50.0,  # Variance of the Laplacian on the decimated frame
+        "max_dark": 0.05,  # Fraction of pixels clipped to black
+        "max_bright": 0.05,  # Fraction of pixels clipped to white
+        "decimate": 4,
+        "budget_ms": 5.0,
+        "retries": 2,
+        "log_file": None,  # CSV with the scores of every checked frame
+    },
+    "duplicates": {"enabled": False, "threshold": 4, "action": "flag", "retries": 2},  # action: flag or regrab
+    "previews": {"enabled": False, "preview_size": 512, "thumbnail_size": 128, "quality": 85, "contact_columns": 10},
+    "mosaic": {"enabled": False, "scale": 0.125, "min_response": 0.05},  # Per-layer mosaics from downscaled frames
+    "resume": {"enabled": False, "sync_every": 16, "sync_ms": 500},  # Crash-resume capture journal
+    "metrics": {"enabled": False, "host": "127.0.0.1", "port": 9464},  # Prometheus endpoint at /metrics
+    "logging": {
+        "level": "INFO",
+        "modules": {},  # Per-module levels, e.g. {"serial_controller": "DEBUG"}
+        "console": "INFO",  # Lowest level shown on the terminal; null turns console output off
+        "file": None,  # JSONL log, rotated at max_mb with this many backups
+        "max_mb": 16,
+        "backups": 5,
+    },
+    "record_file": None,  # Session recording for 'plc-control replay'
+}
+
+# Behaviour of the former forked copies (Merge/, Split/PLCCounting, Split/pythonCounting, Split/virtualPLC)
+VARIANTS = {
+    "merged": {},
+    "plc-counting": {
+        "handler": "batch",
+        "camera": {"grabber": False},
+        "output": {"sink": "png:1", "writer": "sync"},  # The forks wrote JPEG; "jpeg:95" restores it explicitly
+        "settle_time": 0.1,
+    },
+    "python-counting": {
+        "handler": "batch",
+        "camera": {"grabber": False},
+        "output": {"sink": "png:1", "writer": "sync"},
+        "settle_time": 0.1,
+        "layer_offset": -2,
+        "confirm_saved": True,
+    },
+    "virtual-plc": {
+        "handler": "batch",
+        "serial": {"port": "COM2"},
+        "camera": {"backend": "dummy", "grabber": False},
+        "output": {"writer": "sync"},
+        "settle_time": 0.1,
+        "layer_base": 1,
+    },
+}
+
+
+def merge_config(base, override):
+    """Return ``base`` updated recursively with ``override``."""
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_config(path=None, variant=None, overrides=None):
+    """Build a station config from variant defaults, an optional JSON file and overrides.
+
+    Precedence, lowest first: base defaults, variant defaults, config file,
+    the IMAGE_SINK / SESSION_CONTAINER / TRACE_FILE environment variables,
+    then ``overrides``.
+    """
+    file_config = {}
+    if path:
+        with open(path) as f:
+            file_config = json.load(f)
+    return build_config(file_config, variant, overrides)
+
+
+def build_config(file_config, variant=None, overrides=None):
+    """Apply ``file_config``, the environment and ``overrides`` on top of the variant defaults."""
+    variant = variant or file_config.get("variant") or BASE_CONFIG["variant"]
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown variant '{variant}'. Choose from: {', '.join(VARIANTS)}.")
+
+    config = merge_config(BASE_CONFIG, VARIANTS[variant])
+    config = merge_config(config, file_config)
+    config["variant"] = variant
+
+    if os.environ.get("IMAGE_SINK"):
+        config["output"]["sink"] = os.environ["IMAGE_SINK"]
+    if os.environ.get("SESSION_CONTAINER") == "1":
+        config["output"]["writer"] = "container"
+    if os.environ.get("TRACE_FILE"):
+        config["trace_file"] = os.environ["TRACE_FILE"]
+
+    return merge_config(config, overrides or {})
+
+
+# =========================
+# Multi-Station Configuration
+# =========================
+#
+# Keys next to "stations" are shared by every station; each entry only
+# needs what differs. "{name}" in "socket" is replaced by the station name,
+# trace files get a "_<name>" suffix and every station writes below
+# "<output.root>/<name>":
+#
+#   {
+#     "variant": "merged",
+#     "output": {"root": "/data/inspection", "sink": "png:3"},
+#     "stations": [
+#       {"name": "cell1", "serial": {"port": "/dev/ttyUSB0"}, "camera": {"device": "/dev/video0"}},
+#       {"name": "cell2", "serial": {"port": "/dev/ttyUSB1"}, "camera": {"device": "/dev/video2"}}
+#     ]
+#   }
+
+DEFAULT_STATION_SOCKET = "/tmp/plc_station_{name}.sock"
+
+
+def load_station_configs(path, overrides=None):
+    """Return one full config per entry of the "stations" list in ``path``."""
+    with open(path) as f:
+        file_config = json.load(f)
+
+    stations = file_config.pop("stations", None)
+    if not stations:
+        raise ValueError(f"No stations defined in {path}.")
+
+    configs = []
+    names = set()
+    for index, station in enumerate(stations):
+        station_file_config = merge_config(file_config, station)
+        name = station_file_config.setdefault("name", f"station{index + 1}")
+        if name in names:
+            raise ValueError(f"Duplicate station name '{name}'.")
+        names.add(name)
+
+        config = build_config(station_file_config, overrides=overrides)
+        shared_root = file_config.get("output", {}).get("root") or os.getcwd()
+        if not station.get("output", {}).get("root"):
+            config["output"]["root"] = os.path.join(shared_root, name)
+        config["socket"] = config.get("socket", DEFAULT_STATION_SOCKET).format(name=name)
+        if config["trace_file"]:
+            stem, extension = os.path.splitext(config["trace_file"])
+            config["trace_file"] = f"{stem}_{name}{extension}"
+        configs.append(config)
+    return configs
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# FrameGrabber Class
+# =========================
+
+TimestampedFrame = namedtuple("TimestampedFrame", ["seq", "timestamp", "frame", "read_at"])
+
+CAP_PROP_POS_MSEC = 0  # cv2.CAP_PROP_POS_MSEC, without importing OpenCV here
+MAX_FRAME_AGE = 5.0  # Seconds; older device timestamps are treated as a different clock
+RING_SIZE = 4
+
+
+def device_timestamp(capture, read_at):
+    """Return the exposure time of the frame just read, in ``time.monotonic()`` seconds.
+
+    V4L2 stamps every buffer with CLOCK_MONOTONIC, which OpenCV reports as
+    ``CAP_PROP_POS_MSEC``. Returns None when the backend reports nothing
+    usable (0, or a value on another clock), so the caller can fall back to
+    host time.
+    """
+    timestamp = capture.get(CAP_PROP_POS_MSEC) / 1000.0
+    if read_at - MAX_FRAME_AGE <= timestamp <= read_at + 0.005:
+        return timestamp
+    return None
+
+
+class FrameGrabber:
+    """Read a capture device continuously on a dedicated thread.
+
+    The most recent frames are kept in a small ring, each stamped with its
+    exposure time from the device clock (or, if the backend has none, the
+    ``time.monotonic()`` at which the read returned). Because the device is
+    drained constantly there are no stale frames to flush before a capture;
+    callers ask for the first frame newer than a given time instead.
+
+    With a ``pool`` frames are read into pooled buffers: the ring holds one
+    reference to each, released when the frame falls out of the ring, and
+    ``wait_for_frame`` retains the returned frame for the caller. When no
+    buffer is free the oldest ring frames are given up (the newest stays),
+    so a pool no larger than the ring shortens the ring instead of stopping
+    the grabber.
+    """
+
+    def __init__(self, capture, ring_size=RING_SIZE, pool=None):
+        self.capture = capture
+        self.pool = pool
+        self.ring = deque(maxlen=ring_size)
+        self.read_failures = 0
+        self.device_clock = True  # Cleared once the backend reports an unusable timestamp
+        self.last_discarded = 0  # Frames read after the last request but exposed before it
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while self._running:
+            buffer = None
+            if self.pool is not None:
+                buffer = self.pool.acquire(timeout=0)
+                while buffer is None and self._drop_oldest():
+                    buffer = self.pool.acquire(timeout=0)
+                if buffer is None:
+                    buffer = self.pool.acquire(timeout=0.5)
+                    if buffer is None:
+                        continue  # Every buffer is held downstream; the device drops frames meanwhile
+            ret, frame = self.capture.read(buffer) if buffer is not None else self.capture.read()
+            read_at = time.monotonic()
+            if buffer is not None and frame is not buffer:
+                self.pool.release(buffer)
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.01)  # Avoid spinning on a disconnected device
+                continue
+            timestamp = None
+            if self.device_clock:
+                timestamp = device_timestamp(self.capture, read_at)
+                if timestamp is None:
+                    self.device_clock = False
+                    log.warning("Camera reports no usable frame timestamps; using host time.")
+            with self._cond:
+                self._seq += 1
+                if self.pool is not None and len(self.ring) == self.ring.maxlen:
+                    self.pool.release(self.ring[0].frame)
+                self.ring.append(TimestampedFrame(self._seq, timestamp if timestamp is not None else read_at,
+                                                  frame, read_at))
+                self._cond.notify_all()
+
+    def _drop_oldest(self):
+        """Release the oldest ring frame so its buffer can be reused; the newest one is always kept."""
+        with self._cond:
+            if len(self.ring) < 2:
+                return False
+            self.pool.release(self.ring.popleft().frame)
+            return True
+
+    def latest(self):
+        """Return the newest frame in the ring, or None if nothing was read yet.
+
+        With a pool the frame is not retained: its buffer is reused once it
+        falls out of the ring.
+        """
+        with self._cond:
+            return self.ring[-1] if self.ring else None
+
+    def wait_for_frame(self, newer_than, timeout=1.0):
+        """Return the first frame exposed after ``newer_than`` (monotonic seconds).
+
+        Blocks for at most ``timeout`` seconds and returns None if no such
+        frame arrived in time. ``last_discarded`` counts the frames that were
+        delivered after ``newer_than`` but exposed before it.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                discarded = 0
+                for item in self.ring:
+                    if item.timestamp > newer_than:
+                        self.last_discarded = discarded
+                        if self.pool is not None:
+                            self.pool.retain(item.frame)
+                        return item
+                    if item.read_at > newer_than:
+                        discarded += 1
+                self.last_discarded = discarded
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    return None
+                self._cond.wait(remaining)
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.pool is not None and self._thread is None:
+            with self._cond:
+                for item in self.ring:
+                    self.pool.release(item.frame)
+                self.ring.clear()
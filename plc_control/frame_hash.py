@@ -0,0 +1,77 @@
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+HASH_SIZE = 8  # 8x8 difference hash, 64 bits
+SAMPLE_SIZE = 64  # The frame is decimated to about this many rows/columns before the resize
+
+
+def frame_hash(frame, hash_size=HASH_SIZE):
+    """Difference hash of a frame as an int.
+
+    The frame is decimated, converted to grayscale and shrunk to
+    ``(hash_size + 1) x hash_size``; every bit says whether a pixel is
+    brighter than its right neighbour. Costs about a millisecond at 2048x2048.
+    """
+    import cv2
+    import numpy as np
+
+    step = max(1, min(frame.shape[0], frame.shape[1]) // SAMPLE_SIZE)
+    small = frame[::step, ::step]
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    tiny = cv2.resize(small, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (tiny[:, 1:] > tiny[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), byteorder='big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+# =========================
+# DuplicateDetector Class
+# =========================
+
+class DuplicateDetector:
+    """Flag frames that look the same as the previous section's frame.
+
+    A stale frame from before the stage moved hashes (nearly) the same as
+    the last accepted one. ``check`` returns the Hamming distance between the
+    two hashes; at or below ``threshold`` bits the frame is a duplicate.
+    With ``action="regrab"`` the handler grabs again up to ``retries``
+    times before accepting and flagging the frame; ``"flag"`` only logs it.
+    """
+
+    def __init__(self, threshold=4, action="flag", retries=2):
+        if action not in ("flag", "regrab"):
+            raise ValueError(f"Unknown duplicate action '{action}'.")
+        self.threshold = threshold
+        self.action = action
+        self.retries = retries
+        self.previous = None
+        self.checked = 0
+        self.flagged = 0
+
+    def check(self, frame):
+        """Return ``(duplicate, distance, hash)``; distance is None for the first frame."""
+        value = frame_hash(frame)
+        self.checked += 1
+        if self.previous is None:
+            return False, None, value
+        distance = hamming(value, self.previous)
+        return distance <= self.threshold, distance, value
+
+    def accept(self, value, duplicate=False):
+        """Remember the hash of the frame that was kept for this section."""
+        self.previous = value
+        if duplicate:
+            self.flagged += 1
+
+    def reset(self):
+        self.previous = None
+
+    def close(self):
+        if self.checked:
+            log.info("Duplicate check: %d frame(s) hashed, %d kept as duplicate(s)", self.checked, self.flagged)
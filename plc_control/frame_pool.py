@@ -0,0 +1,91 @@
+import threading
+import time
+
+
+# =========================
+# FramePool Class
+# =========================
+
+class FramePool:
+    """Fixed set of preallocated frame buffers, shared by reference and recycled by refcount.
+
+    The camera reads into a buffer from ``acquire`` (refcount 1). Every
+    consumer that keeps the frame past the capture call (background writer,
+    previews, mosaic, recorder) calls ``retain`` when it takes it and
+    ``release`` when done; the buffer goes back to the pool at refcount 0.
+    ``acquire`` blocks while every buffer is in use, which holds the camera
+    back instead of allocating: memory never exceeds ``count`` frames, and
+    ``max_bytes`` caps ``count`` further. Arrays that did not come from the
+    pool are ignored by ``retain``/``release``, so callers need not check.
+
+    ``reserve`` is the most buffers the consumers can hold at once (grabber
+    ring, writer queue); a pool without one more buffer than that could
+    starve the camera, so it is rejected.
+    """
+
+    def __init__(self, shape, count=24, dtype="uint8", max_bytes=None, reserve=0):
+        import numpy as np
+
+        frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if max_bytes:
+            count = min(count, max_bytes // frame_bytes)
+        if count < 1:
+            raise ValueError(f"Frame pool cap of {max_bytes} bytes is smaller than one {shape} frame.")
+        if count <= reserve:
+            raise ValueError(f"Frame pool of {count} buffer(s) is too small: the grabber ring and writer queue can "
+                             f"hold {reserve}, so it needs at least {reserve + 1}.")
+        self.shape = tuple(shape)
+        self.count = count
+        self.frame_bytes = frame_bytes
+        self.buffers = [np.empty(self.shape, dtype=dtype) for _ in range(count)]
+        self._index = {id(buffer): index for index, buffer in enumerate(self.buffers)}
+        self._refs = [0] * count
+        self._free = list(range(count - 1, -1, -1))
+        self._cond = threading.Condition()
+        self.peak = 0  # Most buffers in use at once
+        self.waits = 0  # acquire calls that had to wait for a release
+        self.wait_seconds = 0.0
+
+    @property
+    def in_use(self):
+        return self.count - len(self._free)
+
+    def acquire(self, timeout=None):
+        """Take a free buffer (refcount 1), waiting up to ``timeout`` seconds; None if none came free."""
+        with self._cond:
+            if not self._free:
+                if timeout == 0:
+                    return None
+                self.waits += 1
+                started = time.monotonic()
+                self._cond.wait_for(lambda: self._free, timeout)
+                self.wait_seconds += time.monotonic() - started
+                if not self._free:
+                    return None
+            index = self._free.pop()
+            self._refs[index] = 1
+            self.peak = max(self.peak, self.count - len(self._free))
+            return self.buffers[index]
+
+    def retain(self, frame):
+        index = self._index.get(id(frame))
+        if index is not None:
+            with self._cond:
+                self._refs[index] += 1
+        return frame
+
+    def release(self, frame):
+        index = self._index.get(id(frame))
+        if index is None:
+            return
+        with self._cond:
+            if self._refs[index] <= 0:
+                raise Exception("Frame buffer released more often than it was retained.")
+            self._refs[index] -= 1
+            if self._refs[index] == 0:
+                self._free.append(index)
+                self._cond.notify()
+
+    def summary(self):
+        return (f"Frame pool: {self.count} x {self.frame_bytes / 2 ** 20:.1f} MiB, peak {self.peak} in use, "
+                f"{self.waits} wait(s) totalling {self.wait_seconds:.2f} s")
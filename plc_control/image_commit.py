@@ -0,0 +1,168 @@
+import os
+import threading
+from concurrent.futures import Future
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+FSYNC_POLICIES = ("none", "file", "layer")
+
+
+def fsync_file(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_directory(path):
+    """Persist the renames in ``path``; silently skipped where directories cannot be opened (Windows)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# =========================
+# ImageCommitter Class
+# =========================
+
+class PendingCommit:
+    """One image on its way to disk; ``future`` resolves to the write result once the image is durable."""
+
+    __slots__ = ("committer", "save_path", "group", "future")
+
+    def __init__(self, committer, save_path, group):
+        self.committer = committer
+        self.save_path = save_path
+        self.group = group
+        self.future = Future()
+
+    def written(self, result):
+        """Report that the image was renamed into place (``result`` is falsy if the write failed)."""
+        self.committer._written(self, result)
+
+
+class _Group:
+    __slots__ = ("commits", "outstanding", "sealed")
+
+    def __init__(self):
+        self.commits = []  # (commit, result) written so far
+        self.outstanding = 0  # Begun but not yet written
+        self.sealed = False
+
+
+class ImageCommitter:
+    """Resolve a future per image once it is durable under the configured fsync policy.
+
+    Sinks always write to a temporary file and rename it into place, so an
+    image that exists is complete. ``policy`` decides when it is durable:
+
+    * ``"none"``: as soon as it is renamed (the OS flushes it later).
+    * ``"file"``: after the file and its directory are fsynced.
+    * ``"layer"``: group commit; images are fsynced together when the handler
+      ``seal``\\ s the layer and its last write has finished, on ``executor``
+      if given so the capture thread is not held up.
+
+    A failed write resolves its future with the falsy result immediately.
+    """
+
+    def __init__(self, policy="none", executor=None):
+        if policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{policy}'. Choose from: {', '.join(FSYNC_POLICIES)}.")
+        self.policy = policy
+        self.executor = executor
+        self.group_commits = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._group = _Group()
+        self._unresolved = 0
+
+    def begin(self, save_path):
+        """Start tracking the image that is about to be written to ``save_path``."""
+        with self._lock:
+            self._unresolved += 1
+            self._group.outstanding += 1
+            return PendingCommit(self, save_path, self._group)
+
+    def _written(self, commit, result):
+        if not result or self.policy != "layer":
+            if result and self.policy == "file":
+                try:
+                    fsync_file(commit.save_path)
+                    fsync_directory(os.path.dirname(commit.save_path) or ".")
+                except OSError as e:
+                    log.error("Failed to sync %s: %s", commit.save_path, e)
+                    result = False
+            with self._lock:
+                commit.group.outstanding -= 1
+                ready = commit.group.sealed and commit.group.outstanding == 0
+            self._resolve(commit.future, result)
+        else:
+            with self._lock:
+                commit.group.commits.append((commit, result))
+                commit.group.outstanding -= 1
+                ready = commit.group.sealed and commit.group.outstanding == 0
+        if ready:
+            self._commit_group(commit.group)
+
+    def seal(self):
+        """Close the current group (e.g. at a layer change); it is committed once its last write is done."""
+        with self._lock:
+            group = self._group
+            if not group.commits and not group.outstanding:
+                return
+            group.sealed = True
+            self._group = _Group()
+            ready = group.outstanding == 0
+        if ready:
+            if self.executor is not None:
+                try:
+                    self.executor.submit(self._commit_group, group)
+                    return
+                except RuntimeError:
+                    pass  # Pool already shut down
+            self._commit_group(group)
+
+    def _commit_group(self, group):
+        if not group.commits:
+            return
+        directories = set()
+        synced = []
+        for commit, result in group.commits:
+            try:
+                fsync_file(commit.save_path)
+                directories.add(os.path.dirname(commit.save_path) or ".")
+            except OSError as e:
+                log.error("Failed to sync %s: %s", commit.save_path, e)
+                result = False
+            synced.append((commit, result))
+        for directory in directories:
+            fsync_directory(directory)
+        with self._lock:
+            self.group_commits += 1
+        for commit, result in synced:
+            self._resolve(commit.future, result)
+
+    def _resolve(self, future, result):
+        future.set_result(result)  # Runs the done callbacks, e.g. the manifest and journal records
+        with self._lock:
+            self._unresolved -= 1
+            if self._unresolved == 0:
+                self._idle.notify_all()
+
+    def close(self):
+        """Seal the open group and wait until every begun image is resolved."""
+        self.seal()
+        with self._idle:
+            self._idle.wait_for(lambda: self._unresolved == 0)
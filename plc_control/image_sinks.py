@@ -0,0 +1,187 @@
+import io
+import os
+import threading
+import time
+import zlib
+from collections import namedtuple
+
+
+# =========================
+# Image Sinks
+# =========================
+
+SinkResult = namedtuple("SinkResult", ["save_path", "encode_seconds", "write_seconds", "num_bytes", "checksum"])
+
+
+class ImageSink:
+    """Base class for the on-disk image formats.
+
+    Subclasses implement ``encode`` and return the encoded bytes; ``write``
+    times the encode and the disk write separately and keeps running totals
+    so stations can compare CPU cost against disk usage per format. The
+    result carries the CRC-32 of the written bytes for the manifest.
+
+    Files are written under a temporary name and renamed into place, so a
+    file at ``save_path`` is always complete; ``ImageCommitter`` decides
+    when it is fsynced.
+    """
+
+    name = None
+    extension = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.encode_seconds = 0.0
+        self.write_seconds = 0.0
+        self.num_bytes = 0
+
+    def path_for(self, base_path):
+        """Return ``base_path`` (no extension) with this sink's extension appended."""
+        return base_path + self.extension
+
+    def encode(self, frame):
+        raise NotImplementedError
+
+    def write(self, save_path, frame):
+        """Encode ``frame`` and write it to ``save_path``. Raises IOError on failure."""
+        start = time.perf_counter()
+        data = self.encode(frame)
+        encoded = time.perf_counter()
+        temp_path = save_path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, save_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        written = time.perf_counter()
+
+        result = SinkResult(save_path, encoded - start, written - encoded, memoryview(data).nbytes, zlib.crc32(data))
+        with self._lock:
+            self.count += 1
+            self.encode_seconds += result.encode_seconds
+            self.write_seconds += result.write_seconds
+            self.num_bytes += result.num_bytes
+        return result
+
+    def summary(self):
+        """Return a one-line summary of the totals so far."""
+        if not self.count:
+            return f"{self.describe()}: no images written"
+        return (f"{self.describe()}: {self.count} image(s), "
+                f"avg encode {self.encode_seconds / self.count * 1000:.1f} ms, "
+                f"avg write {self.write_seconds / self.count * 1000:.1f} ms, "
+                f"avg size {self.num_bytes / self.count / 1024:.0f} KiB")
+
+    def describe(self):
+        return self.name
+
+
+class _OpenCVSink(ImageSink):
+    def params(self, cv2):
+        return []
+
+    def encode(self, frame):
+        import cv2  # Deferred so choosing a sink does not pay the OpenCV import
+
+        ok, buffer = cv2.imencode(self.extension, frame, self.params(cv2))
+        if not ok:
+            raise IOError(f"OpenCV failed to encode {self.extension}")
+        return buffer
+
+
+class PngSink(_OpenCVSink):
+    name = "png"
+    extension = ".png"
+
+    def __init__(self, level=3):
+        super().__init__()
+        if not 0 <= level <= 9:
+            raise ValueError("PNG compression level must be between 0 and 9.")
+        self.level = level
+
+    def params(self, cv2):
+        return [cv2.IMWRITE_PNG_COMPRESSION, self.level]
+
+    def describe(self):
+        return f"png:{self.level}"
+
+
+class TiffSink(_OpenCVSink):
+    name = "tiff"
+    extension = ".tiff"
+
+    def params(self, cv2):
+        return [cv2.IMWRITE_TIFF_COMPRESSION, 1]  # 1 = no compression
+
+
+class WebpSink(_OpenCVSink):
+    name = "webp"
+    extension = ".webp"
+
+    def params(self, cv2):
+        return [cv2.IMWRITE_WEBP_QUALITY, 101]  # Quality above 100 selects lossless mode
+
+
+class JpegSink(_OpenCVSink):
+    """Lossy output; only used when a station asks for it explicitly."""
+
+    name = "jpeg"
+    extension = ".jpg"
+
+    def __init__(self, quality=95):
+        super().__init__()
+        self.quality = quality
+
+    def params(self, cv2):
+        return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+
+    def describe(self):
+        return f"jpeg:{self.quality}"
+
+
+class NpySink(ImageSink):
+    """Raw array dump: no encode cost, largest files."""
+
+    name = "npy"
+    extension = ".npy"
+
+    def encode(self, frame):
+        import numpy as np
+
+        out = io.BytesIO()
+        np.save(out, frame, allow_pickle=False)
+        return out.getbuffer()
+
+
+SINKS = {
+    "png": PngSink,
+    "tiff": TiffSink,
+    "webp": WebpSink,
+    "jpeg": JpegSink,
+    "npy": NpySink,
+}
+
+
+def make_sink(spec="png:9"):
+    """Build a sink from a config string such as ``png:6``, ``tiff``, ``webp`` or ``npy``.
+
+    The optional value after the colon is the PNG level or JPEG quality.
+    """
+    name, _, option = spec.strip().lower().partition(":")
+    if name in ("tif",):
+        name = "tiff"
+    elif name in ("jpg",):
+        name = "jpeg"
+    if name not in SINKS:
+        raise ValueError(f"Unknown image sink '{spec}'. Choose from: {', '.join(sorted(SINKS))}.")
+    if option:
+        if name not in ("png", "jpeg"):
+            raise ValueError(f"Image sink '{name}' does not take an option.")
+        return SINKS[name](int(option))
+    return SINKS[name]()
@@ -0,0 +1,110 @@
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# ImageWriter Class
+# =========================
+
+WriteFailure = namedtuple("WriteFailure", ["layer", "section", "save_path", "error"])
+
+
+class ImageWriter:
+    """Encode and write captured frames on a bounded background worker pool.
+
+    The capture path only has to hand over a frame that is already in memory;
+    encoding and disk I/O happen here, so the PLC can be acknowledged before
+    the image is on disk. Failed writes are collected per section in
+    ``failures`` instead of being reported to the PLC.
+
+    Several writers can share one ``executor`` (e.g. one pool for all
+    stations); ``close()`` then waits for this writer's frames only and
+    leaves the pool running.
+    """
+
+    def __init__(self, write_fn, max_workers=2, max_pending=8, executor=None):
+        self.write_fn = write_fn
+        self.owns_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-writer")
+        self.executor = executor
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.completed = 0
+        self.failures = []
+
+    @property
+    def pending(self):
+        """Number of frames submitted but not yet written."""
+        return self._pending
+
+    def submit(self, save_path, frame, layer=None, section=None, on_done=None):
+        """Queue a frame for writing. Blocks while ``max_pending`` frames are in flight.
+
+        ``on_done`` is called on the worker thread with the result of
+        ``write_fn`` (False if the write failed) before ``close`` can
+        return, e.g. ``PendingCommit.written``.
+        """
+        self._slots.acquire()
+        with self._lock:
+            self._pending += 1
+        try:
+            return self.executor.submit(self._write, save_path, frame, layer, section, on_done)
+        except Exception:
+            self._finish()
+            raise
+
+    def _write(self, save_path, frame, layer, section, on_done=None):
+        try:
+            result = self.write_fn(save_path, frame)
+            if not result:
+                raise IOError("encoder returned False")
+            with self._lock:
+                self.completed += 1
+        except Exception as e:
+            result = False
+            with self._lock:
+                self.failures.append(WriteFailure(layer, section, save_path, str(e)))
+            log.error("Failed to write layer %s section %s to %s: %s", layer, section, save_path, e)
+        try:
+            if on_done is not None:
+                on_done(result)
+        except Exception as e:
+            log.error("Post-write step failed for layer %s section %s: %s", layer, section, e)
+        finally:
+            self._finish()
+        return bool(result)
+
+    def _finish(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._idle.notify_all()
+        self._slots.release()
+
+    def report(self):
+        """Log a summary of the writes done so far."""
+        if self.failures:
+            log.error("%d image(s) failed to write:", len(self.failures))
+            for failure in self.failures:
+                log.error("  layer %s section %s: %s (%s)", failure.layer, failure.section, failure.save_path,
+                          failure.error)
+        else:
+            log.info("All %d image(s) written.", self.completed)
+
+    def close(self, wait=True):
+        """Wait for queued writes to finish and shut the worker pool down (unless it is shared)."""
+        if not self.owns_executor:
+            if wait:
+                with self._idle:
+                    self._idle.wait_for(lambda: self._pending == 0)
+            return
+        self.executor.shutdown(wait=wait)
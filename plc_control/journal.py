@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+
+
+JOURNAL_NAME = ".capture_journal"
+HEADER = "# plc-control capture journal 1\n"
+END = "end"
+
+
+# =========================
+# CaptureJournal Class
+# =========================
+
+class CaptureJournal:
+    """Write-ahead record of the sections of one product that are safely stored.
+
+    One line per completed section (``layer<TAB>section<TAB>path``, the
+    path relative to the journal's directory) is appended as soon as its
+    write completes and handed to the OS straight away, so a crashed process
+    loses nothing. ``fsync`` is batched: at most every ``sync_every``
+    records or ``sync_seconds``, so a power cut can cost a few sections,
+    which are simply captured again. A clean exit (700) appends ``end``.
+
+    Opening an unfinished journal reloads it: ``done`` then tells the handler
+    which sections can be acknowledged without capturing. Entries whose
+    file has disappeared are dropped. A finished journal is started afresh.
+    """
+
+    def __init__(self, path, sync_every=16, sync_seconds=0.5):
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.sync_every = sync_every
+        self.sync_seconds = sync_seconds
+        self.completed = {}  # (layer number, section) -> relative path
+        self._stems = set()  # Relative paths without extension, to keep new names from reusing old ones
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        entries, finished = read_journal(path)
+        if entries is not None and not finished:
+            for layer, section, relative in entries:
+                if os.path.exists(os.path.join(self.directory, relative)):
+                    self._add(layer, section, relative)
+            _drop_torn_line(path)
+            self._file = open(path, "a")
+        else:
+            self._file = open(path, "w")
+            self._file.write(HEADER)
+            self._sync()
+
+    def _add(self, layer, section, relative):
+        self.completed[(layer, section)] = relative
+        self._stems.add(os.path.splitext(relative)[0])
+
+    def done(self, layer, section):
+        return (layer, section) in self.completed
+
+    def holds(self, base_path):
+        """True if a recorded image was saved under ``base_path`` (no extension)."""
+        return os.path.relpath(base_path, self.directory) in self._stems
+
+    def record(self, layer, section, path):
+        """Append a completed section; ``layer`` is the 1-based layer number."""
+        relative = os.path.relpath(path, self.directory)
+        with self._lock:
+            if self._file is None:
+                return
+            self._add(layer, section, relative)
+            self._file.write(f"{layer}\t{section}\t{relative}\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_seconds:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self, finished=False):
+        """Sync and close; ``finished`` marks the product as complete so it is not resumed."""
+        with self._lock:
+            if self._file is None:
+                return
+            if finished:
+                self._file.write(END + "\n")
+            self._sync()
+            self._file.close()
+            self._file = None
+
+
+def read_journal(path):
+    """Return ``(entries, finished)``; entries is None if there is no journal at ``path``."""
+    if not os.path.exists(path):
+        return None, False
+    entries = []
+    finished = False
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            if line.strip() == END:
+                finished = True
+                continue
+            fields = line.rstrip("\n").split("\t", 2)
+            if len(fields) != 3 or not line.endswith("\n"):
+                continue  # Torn last line of a crashed run
+            try:
+                entries.append((int(fields[0]), int(fields[1]), fields[2]))
+            except ValueError:
+                continue
+    return entries, finished
+
+
+def _drop_torn_line(path):
+    """Cut off a last line without its newline, so a record torn by a crash is never completed by the next one."""
+    with open(path, "rb+") as f:
+        content = f.read()
+        if content and not content.endswith(b"\n"):
+            f.truncate(content.rfind(b"\n") + 1)
+
+
+def unfinished_journal(directory):
+    """True if ``directory`` holds the journal of a product that was interrupted."""
+    entries, finished = read_journal(os.path.join(directory, JOURNAL_NAME))
+    return entries is not None and not finished
@@ -0,0 +1,146 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+
+
+ROOT_LOGGER = "plc_control"
+
+# Attributes every LogRecord has; anything else came in through ``extra=`` and goes into the JSONL fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def get_logger(name):
+    """Logger of a ``plc_control`` module, e.g. ``get_logger(__name__)``."""
+    return logging.getLogger(name)
+
+
+# =========================
+# Handlers and Formatters
+# =========================
+
+class ConsoleHandler(logging.Handler):
+    """``[LEVEL] message`` on stdout, through ``tqdm.write`` so progress bars are not torn."""
+
+    def __init__(self, level=logging.NOTSET):
+        super().__init__(level)
+        self.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        self._write = None
+
+    def emit(self, record):
+        try:
+            if self._write is None:
+                try:
+                    from tqdm import tqdm
+
+                    self._write = tqdm.write
+                except ImportError:
+                    self._write = print
+            self._write(self.format(record))
+        except Exception:
+            self.handleError(record)
+
+
+class JsonlFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, thread, message and any ``extra`` fields."""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+# =========================
+# Logging Setup
+# =========================
+
+_default_handler = ConsoleHandler()
+_listener = None
+
+
+def _install_default():
+    """Until ``setup_logging`` runs, records go straight to the console at INFO, like the former prints."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    if not logger.handlers:
+        logger.addHandler(_default_handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def setup_logging(config):
+    """Route ``plc_control`` logging through a background queue listener.
+
+    ``config`` is the ``logging`` section of a station config. Callers only
+    put records on an unbounded queue, so a slow terminal or disk never
+    blocks the serial or camera threads; the listener thread formats and
+    writes them. Levels are set per module on the loggers, so a disabled
+    ``debug`` call returns after one level check. Calling it again replaces
+    the previous setup.
+    """
+    global _listener
+    stop_logging()
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.setLevel(_level(config["level"]))
+    logger.propagate = False
+    for module, level in (config["modules"] or {}).items():
+        name = module if module.startswith(ROOT_LOGGER) else f"{ROOT_LOGGER}.{module}"
+        logging.getLogger(name).setLevel(_level(level))
+
+    handlers = []
+    if config["console"]:
+        handlers.append(ConsoleHandler(_level(config["console"])))
+    if config["file"]:
+        file_handler = logging.handlers.RotatingFileHandler(config["file"], maxBytes=int(config["max_mb"] * 2 ** 20),
+                                                            backupCount=config["backups"], encoding="utf-8")
+        file_handler.setFormatter(JsonlFormatter())
+        handlers.append(file_handler)
+
+    records = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(records))
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """Write out queued records and stop the listener; later records go straight to the console again."""
+    global _listener
+    listener, _listener = _listener, None
+    if listener is None:
+        return
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            logger.removeHandler(handler)
+    _install_default()
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def _level(level):
+    if isinstance(level, int):
+        return level
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level '{level}'.")
+    return value
+
+
+_install_default()
+atexit.register(stop_logging)
@@ -0,0 +1,179 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+
+MANIFEST_NAME = "manifest.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id INTEGER PRIMARY KEY,
+    product_id TEXT,
+    username TEXT,
+    station TEXT,
+    output_dir TEXT,
+    started_at REAL
+);
+CREATE TABLE IF NOT EXISTS images (
+    id INTEGER PRIMARY KEY,
+    batch_id INTEGER REFERENCES batches(id),
+    product_id TEXT,
+    layer INTEGER,
+    section INTEGER,
+    path TEXT,
+    received_at REAL,
+    captured_at REAL,
+    written_at REAL,
+    size INTEGER,
+    checksum INTEGER
+);
+CREATE INDEX IF NOT EXISTS batches_product ON batches (product_id);
+CREATE INDEX IF NOT EXISTS images_product ON images (product_id, layer, section);
+CREATE INDEX IF NOT EXISTS images_batch ON images (batch_id, layer, section);
+"""
+
+IMAGE_COLUMNS = ("batch_id", "product_id", "layer", "section", "path", "received_at", "captured_at", "written_at",
+                 "size", "checksum")
+
+
+def wall_time(monotonic_time):
+    """Convert a ``time.monotonic()`` reading to seconds since the epoch."""
+    if monotonic_time is None:
+        return None
+    return time.time() - (time.monotonic() - monotonic_time)
+
+
+# =========================
+# Manifest Class
+# =========================
+
+class Manifest:
+    """SQLite index of the batches and images under one output root.
+
+    Batch IDs are allocated inside a single INSERT, so two processes starting
+    at the same time can never get the same ``Batch_N``. Every image is
+    recorded when its write completes, with its 1-based layer number,
+    section, capture timestamps (epoch seconds), file size and the CRC-32 of
+    the encoded bytes, so downstream tools can look images up by product,
+    batch, layer and section without walking directories. The database runs
+    in WAL mode and may be read by other processes while a station writes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()  # Images are recorded from the writer threads
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def start_batch(self, product_id=None, username=None, station=None, output_dir=None, first_id=1):
+        """Allocate the next batch ID (at least ``first_id``) and return it."""
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO batches (id, product_id, username, station, output_dir, started_at) "
+                "VALUES ((SELECT MAX(COALESCE(MAX(id), 0) + 1, ?) FROM batches), ?, ?, ?, ?, ?)",
+                (first_id, product_id, username, station, output_dir, time.time()),
+            )
+            return cursor.lastrowid
+
+    def update_batch(self, batch_id, product_id=None, output_dir=None):
+        with self._lock:
+            self._db.execute("UPDATE batches SET product_id = COALESCE(?, product_id), "
+                             "output_dir = COALESCE(?, output_dir) WHERE id = ?", (product_id, output_dir, batch_id))
+
+    def discard_batch(self, batch_id):
+        """Forget a batch that was allocated but never used."""
+        with self._lock:
+            self._db.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+    def latest_batch(self, output_dir=None):
+        """Most recent batch, or the most recent one written to ``output_dir``."""
+        with self._lock:
+            if output_dir is None:
+                row = self._db.execute("SELECT * FROM batches ORDER BY id DESC LIMIT 1").fetchone()
+            else:
+                row = self._db.execute("SELECT * FROM batches WHERE output_dir = ? ORDER BY id DESC LIMIT 1",
+                                       (output_dir,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def record_image(self, batch_id, product_id, layer, section, path, received_at=None, captured_at=None,
+                     size=None, checksum=None):
+        """Record a completed image; timestamps are ``time.monotonic()`` readings."""
+        with self._lock:
+            self._db.execute(
+                f"INSERT INTO images ({', '.join(IMAGE_COLUMNS)}) VALUES ({', '.join('?' * len(IMAGE_COLUMNS))})",
+                (batch_id, product_id, layer, section, path, wall_time(received_at), wall_time(captured_at),
+                 time.time(), size, checksum),
+            )
+
+    def batches(self, product_id=None):
+        return self._query("batches", product_id=product_id)
+
+    def images(self, product_id=None, batch_id=None, layer=None, section=None):
+        """Images matching every given key, in capture order."""
+        return self._query("images", product_id=product_id, batch_id=batch_id, layer=layer, section=section)
+
+    def _query(self, table, **keys):
+        keys = {name: value for name, value in keys.items() if value is not None}
+        where = " AND ".join(f"{name} = ?" for name in keys)
+        sql = f"SELECT * FROM {table}" + (f" WHERE {where}" if where else "") + " ORDER BY id"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, tuple(keys.values()))]
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def open_manifest(output_root, name=MANIFEST_NAME):
+    """Open the manifest ``name`` inside ``output_root``; an absolute ``name`` is used as is."""
+    path = os.path.join(output_root or os.getcwd(), name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return Manifest(path)
+
+
+# =========================
+# Main Function
+# =========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control manifest", description="Query the image manifest of a station.")
+    parser.add_argument("manifest", help=f"Manifest file, or the output root containing {MANIFEST_NAME}.")
+    parser.add_argument("--product", help="Product ID.")
+    parser.add_argument("--batch", type=int, help="Batch ID.")
+    parser.add_argument("--layer", type=int, help="1-based layer number.")
+    parser.add_argument("--section", type=int, help="Section number.")
+    parser.add_argument("--batches", action="store_true", help="List batches instead of images.")
+    args = parser.parse_args(argv)
+
+    path = args.manifest
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    if not os.path.exists(path):
+        print(f"[ERROR] No manifest at {path}")
+        return 1
+    manifest = Manifest(path)
+    try:
+        if args.batches:
+            for batch in manifest.batches(args.product):
+                started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(batch["started_at"]))
+                print(f"{batch['id']:6d}  {started}  {batch['product_id'] or '-'}  {batch['username'] or '-'}  "
+                      f"{batch['output_dir'] or '-'}")
+            return 0
+        for image in manifest.images(args.product, args.batch, args.layer, args.section):
+            checksum = f"{image['checksum']:08x}" if image["checksum"] is not None else "-"
+            print(f"{image['batch_id']:6d}  layer {image['layer']:2d}  section {image['section']:2d}  "
+                  f"{image['size'] or 0:10d}  {checksum}  {image['path']}")
+    finally:
+        manifest.close()
+    return 0
+
+
+if __name__ == "__main__":
+    main()
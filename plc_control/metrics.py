@@ -0,0 +1,333 @@
+import shutil
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# Upper bounds of the latency histograms in seconds, from a fast flush to a slow grab or encode
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# =========================
+# Counter and Histogram Classes
+# =========================
+
+class Counter:
+    """Monotonic counter that the hot path updates without taking a lock.
+
+    Every thread adds to a cell of its own, so increments from the serial
+    loop, the camera thread and the writer pool never contend; a scrape sums
+    the cells. The lock is only taken once per thread, to register its cell,
+    and by scrapes. Cells of threads that have exited are folded into a base
+    value then, so recreated executors do not make the cell list grow.
+    """
+
+    __slots__ = ("_local", "_cells", "_base", "_lock")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._cells = {}  # Thread -> its cell
+        self._base = self._empty_cell()  # Sum of the cells of exited threads
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        try:
+            self._local.cell[0] += amount
+        except AttributeError:
+            self._new_cell()[0] += amount
+
+    def _empty_cell(self):
+        return [0]
+
+    def _new_cell(self):
+        cell = self._empty_cell()
+        with self._lock:
+            self._prune()
+            self._cells[threading.current_thread()] = cell
+        self._local.cell = cell
+        return cell
+
+    def _prune(self):
+        """Fold the cells of exited threads into the base; called with the lock held."""
+        for thread in [thread for thread in self._cells if not thread.is_alive()]:
+            for index, value in enumerate(self._cells.pop(thread)):
+                self._base[index] += value
+
+    def _totals(self):
+        with self._lock:
+            self._prune()
+            totals = list(self._base)
+            for cell in self._cells.values():
+                for index, value in enumerate(cell):
+                    totals[index] += value
+        return totals
+
+    @property
+    def value(self):
+        return self._totals()[0]
+
+
+class Histogram(Counter):
+    """Latency histogram with fixed buckets, sharded per thread like ``Counter``.
+
+    A cell holds one count per bucket (the last one is +Inf) followed by the
+    sum of the observed values.
+    """
+
+    __slots__ = ("buckets",)
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        super().__init__()
+
+    def observe(self, value):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._new_cell()
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def _empty_cell(self):
+        return [0] * (len(self.buckets) + 1) + [0.0]
+
+    def snapshot(self):
+        """Return ``(cumulative bucket counts, count, sum)``."""
+        totals = self._totals()
+        cumulative = []
+        running = 0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+    @property
+    def value(self):
+        return self.snapshot()[1]
+
+
+# =========================
+# StationMetrics Class
+# =========================
+
+class StationMetrics:
+    """Counters, cycle time and stage histograms and gauges of one station.
+
+    The handler bumps the counters (``ack``, ``unknown_command``) and the
+    tracer wrapper feeds every finished capture span to ``observe_capture``;
+    the cycle time is the span total the capture trace reports.
+    Parse errors, the writer queue depth, the frame pool and the free disk
+    space are read from the serial port, handler, camera and output root
+    when scraped, so they cost nothing in between.
+    """
+
+    def __init__(self, station, output_root=None):
+        self.station = station
+        self.output_root = output_root
+        self.serial = None
+        self.camera = None
+        self.handler = None  # Handler of the current product, for the writer queue depth
+        self.captures = {result: Counter() for result in ("captured", "failed", "resumed")}
+        self.acks = {code: Counter() for code in (500, 600, 700)}
+        self.unknown_commands = Counter()
+        self.cycle_seconds = Histogram()  # 400 command to ack
+        self.stage_seconds = {}  # Stage -> Histogram, added as stages first appear
+
+    def ack(self, code):
+        self.acks[code].inc()
+
+    def unknown_command(self):
+        self.unknown_commands.inc()
+
+    def observe_capture(self, span, status):
+        if span.counts.get("resumed"):
+            result = "resumed"
+        else:
+            result = "captured" if status == 500 else "failed"
+        self.captures[result].inc()
+        for stage, _, duration in span.stages:
+            histogram = self.stage_seconds.get(stage)
+            if histogram is None:
+                histogram = self.stage_seconds.setdefault(stage, Histogram())
+            histogram.observe(duration)
+        self.cycle_seconds.observe(span.total)
+
+    def collect(self):
+        """Yield ``(name, type, help, samples)`` with samples as ``(suffix, labels, value)``."""
+        station = {"station": self.station}
+        yield ("plc_captures_total", "counter", "Sections handled, by result.",
+               [("", dict(station, result=result), counter.value) for result, counter in self.captures.items()])
+        yield ("plc_acks_total", "counter", "Acknowledgements sent to the PLC, by code.",
+               [("", dict(station, code=str(code)), counter.value) for code, counter in self.acks.items()])
+        yield ("plc_unknown_commands_total", "counter", "Commands from the PLC that were not handled.",
+               [("", station, self.unknown_commands.value)])
+        parser = getattr(self.serial, "parser", None)
+        yield ("plc_parse_discarded_bytes_total", "counter", "Serial bytes discarded while resynchronising frames.",
+               [("", station, getattr(parser, "discarded_bytes", 0))])
+        yield ("plc_serial_read_errors_total", "counter", "Failed reads from the serial port.",
+               [("", station, getattr(self.serial, "read_errors", 0))])
+        yield ("plc_cycle_seconds", "histogram", "Cycle time from the 400 command to the acknowledgement.",
+               _histogram_samples(self.cycle_seconds, station))
+        samples = []
+        for stage, histogram in list(self.stage_seconds.items()):
+            samples.extend(_histogram_samples(histogram, dict(station, stage=stage)))
+        yield ("plc_capture_stage_seconds", "histogram", "Duration of each capture stage.", samples)
+
+        writer = getattr(self.handler, "image_writer", None)
+        yield ("plc_writer_queue_depth", "gauge", "Images waiting for or being written by the image writer.",
+               [("", station, writer.pending if writer is not None else 0)])
+        pool = getattr(self.camera, "frame_pool", None)
+        yield ("plc_frame_pool_buffers", "gauge", "Preallocated frame buffers.",
+               [("", station, pool.count if pool is not None else 0)])
+        yield ("plc_frame_pool_in_use", "gauge", "Frame buffers currently held by the camera or a consumer.",
+               [("", station, pool.in_use if pool is not None else 0)])
+        if self.output_root:
+            try:
+                free = shutil.disk_usage(self.output_root).free
+            except OSError:
+                free = None
+            if free is not None:
+                yield ("plc_disk_free_bytes", "gauge", "Free space on the output file system.",
+                       [("", station, free)])
+
+
+def _histogram_samples(histogram, labels):
+    cumulative, count, total = histogram.snapshot()
+    samples = [("_bucket", dict(labels, le=_format_value(bound)), value)
+               for bound, value in zip(histogram.buckets, cumulative)]
+    samples.append(("_bucket", dict(labels, le="+Inf"), count))
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, count))
+    return samples
+
+
+class MetricsTracer:
+    """Tracer wrapper that feeds every finished capture to the station metrics.
+
+    ``tracer`` is the configured ``CaptureTracer``, if any; spans are passed
+    on to it so the trace file and its summary are unaffected.
+    """
+
+    def __init__(self, metrics, tracer=None):
+        self.metrics = metrics
+        self.tracer = tracer
+
+    def begin(self, layer, section, received_at=None):
+        from .capture_trace import CaptureSpan
+
+        span = CaptureSpan(self, layer, section, received_at if received_at is not None else time.monotonic())
+        if received_at is not None:
+            span.mark("dispatch")
+        return span
+
+    def _finish(self, span, status):
+        self.metrics.observe_capture(span, status)
+        if self.tracer is not None:
+            self.tracer._finish(span, status)
+
+    def close(self):
+        if self.tracer is not None:
+            self.tracer.close()
+
+
+# =========================
+# MetricsServer Class
+# =========================
+
+def render(sources):
+    """Prometheus text exposition of every metric of ``sources`` (StationMetrics)."""
+    families = {}
+    for source in sources:
+        for name, kind, help_text, samples in source.collect():
+            family = families.setdefault(name, (kind, help_text, []))
+            family[2].extend(samples)
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(int(value)) if value.is_integer() and abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving ``/metrics`` for every station registered with it.
+
+    The server runs on daemon threads and only reads the metrics, so a slow
+    scraper never holds up a capture.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9464):
+        self.sources = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = render(list(server.sources)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.address = self.httpd.server_address
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        log.info("Metrics on http://%s:%s/metrics", *self.address[:2])
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+
+_servers = {}  # (host, port) -> MetricsServer shared by the stations of this process
+_servers_lock = threading.Lock()
+
+
+def serve_metrics(metrics, host="127.0.0.1", port=9464):
+    """Publish ``metrics`` on the endpoint at ``host:port``, starting it on first use."""
+    with _servers_lock:
+        server = _servers.get((host, port))
+        if server is None:
+            server = _servers[(host, port)] = MetricsServer(host, port)
+        server.sources.append(metrics)
+    return server
+
+
+def stop_metrics(metrics):
+    """Withdraw ``metrics``; an endpoint is shut down when its last station is gone."""
+    with _servers_lock:
+        for key, server in list(_servers.items()):
+            if metrics in server.sources:
+                server.sources.remove(metrics)
+                if not server.sources:
+                    del _servers[key]
+                    server.close()
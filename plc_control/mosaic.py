@@ -0,0 +1,226 @@
+import json
+import os
+import queue
+import sys
+import threading
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+MOSAIC_DIR = "mosaics"
+
+
+# =========================
+# MosaicBuilder Class
+# =========================
+
+class MosaicBuilder:
+    """Assemble one mosaic per layer from the in-memory frames as sections arrive.
+
+    Every frame is downscaled by ``scale``; the offset to the previous
+    section comes from phase correlation of the grayscale copies (a weak
+    correlation peak below ``min_response`` reuses the previous step). Frames
+    are feather-blended into a float canvas preallocated for the whole layer
+    (sections + 1 frame widths), so when the last section of a layer arrives
+    only the normalisation and the PNG write are left. Each mosaic is
+    written to ``mosaics/layerNN.png`` with the section positions (in
+    full-resolution pixels) in ``mosaics/layerNN.json``.
+
+    Work runs on one background thread at the lowest CPU priority; only
+    the downscale happens in ``submit``, so the queue never holds a
+    (pooled) camera frame. ``submit`` never blocks, a section that finds the
+    queue full is left out of the mosaic and counted in ``skipped``.
+    """
+
+    def __init__(self, scale=0.125, min_response=0.05, max_queued=16):
+        self.scale = scale
+        self.min_response = min_response
+        self.skipped = 0
+        self.mosaics = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._layer = None
+        self._thread = threading.Thread(target=self._run, name="mosaic-builder", daemon=True)
+        self._thread.start()
+
+    def submit(self, output_dir, layer, section, sections_in_layer, frame):
+        """Queue a captured frame; ``layer`` is the 1-based layer number. Returns False if it was skipped.
+
+        Only the downscaled copy is queued; ``frame`` can be reused on return.
+        """
+        import cv2
+
+        if self._queue.full():
+            self.skipped += 1
+            return False
+        small = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        try:
+            self._queue.put_nowait((output_dir, layer, section, sections_in_layer, small))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)  # This thread only on Linux
+            except (AttributeError, OSError):
+                pass
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            output_dir, layer, section, sections_in_layer, small = item
+            try:
+                if self._layer is None or (self._layer.output_dir, self._layer.layer) != (output_dir, layer):
+                    self._finish_layer()
+                    self._layer = LayerMosaic(output_dir, layer, sections_in_layer, self.scale, self.min_response)
+                self._layer.add(section, small)
+                if self._layer.complete:
+                    self._write_layer()  # Kept open in case the PLC sends more sections than configured
+            except Exception as e:
+                log.error("Mosaic of layer %s failed at section %s: %s", layer, section, e)
+                self._layer = None
+        self._finish_layer()
+
+    def _write_layer(self):
+        layer = self._layer
+        if layer is not None and layer.count > layer.written:
+            if not layer.written:
+                self.mosaics += 1
+            layer.write()
+
+    def _finish_layer(self):
+        self._write_layer()
+        self._layer = None
+
+    def close(self):
+        """Finish queued sections and write the last mosaic."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        log.info("Mosaics: %d layer(s) assembled, %d section(s) skipped", self.mosaics, self.skipped)
+
+
+class LayerMosaic:
+    """Canvas and placement state of one layer."""
+
+    def __init__(self, output_dir, layer, sections, scale, min_response):
+        self.output_dir = output_dir
+        self.layer = layer
+        self.sections = sections
+        self.scale = scale
+        self.min_response = min_response
+        self.count = 0
+        self.written = 0  # Sections in the last written mosaic
+        self.positions = []  # (section, x, y, response) in canvas pixels
+        self.canvas = None
+        self.weights = None
+        self.origin = (0, 0)  # Canvas pixel of position (0, 0)
+        self._previous = None
+        self._position = (0.0, 0.0)
+        self._step = (0.0, 0.0)
+        self._feather = None
+        self._window = None
+
+    @property
+    def complete(self):
+        return self.sections is not None and self.count >= self.sections
+
+    def add(self, section, small):
+        """Place a frame already downscaled by ``scale``."""
+        import cv2
+        import numpy as np
+
+        if small.ndim == 2:
+            small = cv2.cvtColor(small, cv2.COLOR_GRAY2BGR)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+        height, width = gray.shape
+
+        response = 1.0
+        if self._previous is None:
+            self._allocate(height, width)
+        else:
+            (dx, dy), response = cv2.phaseCorrelate(self._previous, gray, self._window)
+            if response >= self.min_response:
+                self._step = (-dx, -dy)  # phaseCorrelate reports how the content moved
+            self._position = (self._position[0] + self._step[0], self._position[1] + self._step[1])
+        self._previous = gray
+
+        x = int(round(self._position[0]))
+        y = int(round(self._position[1]))
+        self._blend(small, x, y)
+        self.positions.append((section, x, y, response))
+        self.count += 1
+
+    def _allocate(self, height, width):
+        import cv2
+        import numpy as np
+
+        sections = self.sections or 1
+        # Room for every section side by side plus half a frame of vertical drift on each side
+        self.canvas = np.zeros((height * 2, width * (sections + 1), 3), dtype=np.float32)
+        self.weights = np.zeros(self.canvas.shape[:2], dtype=np.float32)
+        self.origin = (width // 2, height // 2)
+        # Feather: weight falls off linearly towards the frame edges so seams blend
+        ramp_y = np.minimum(np.arange(height), np.arange(height)[::-1]).astype(np.float32) + 1
+        ramp_x = np.minimum(np.arange(width), np.arange(width)[::-1]).astype(np.float32) + 1
+        self._feather = np.outer(ramp_y, ramp_x)
+        self._window = cv2.createHanningWindow((width, height), cv2.CV_32F)
+
+    def _blend(self, small, x, y):
+        import numpy as np
+
+        height, width = small.shape[:2]
+        left = self.origin[0] + x
+        top = self.origin[1] + y
+        # Grow the canvas if the ring drifts further than preallocated (e.g. moving the other way)
+        pad_left = max(0, -left)
+        pad_top = max(0, -top)
+        pad_right = max(0, left + width - self.canvas.shape[1])
+        pad_bottom = max(0, top + height - self.canvas.shape[0])
+        if pad_left or pad_top or pad_right or pad_bottom:
+            grow_x = self.canvas.shape[1] // 2
+            pad_left = pad_left and max(pad_left, grow_x)
+            pad_right = pad_right and max(pad_right, grow_x)
+            padding = ((pad_top, pad_bottom), (pad_left, pad_right))
+            self.canvas = np.pad(self.canvas, padding + ((0, 0),))
+            self.weights = np.pad(self.weights, padding)
+            self.origin = (self.origin[0] + pad_left, self.origin[1] + pad_top)
+            left += pad_left
+            top += pad_top
+
+        region = (slice(top, top + height), slice(left, left + width))
+        self.canvas[region] += small * self._feather[..., None]
+        self.weights[region] += self._feather
+
+    def write(self):
+        import cv2
+        import numpy as np
+
+        rows = np.flatnonzero(self.weights.any(axis=1))
+        columns = np.flatnonzero(self.weights.any(axis=0))
+        weights = self.weights[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+        canvas = self.canvas[rows[0]:rows[-1] + 1, columns[0]:columns[-1] + 1]
+        mosaic = (canvas / np.maximum(weights, 1e-6)[..., None]).clip(0, 255).astype(np.uint8)
+
+        directory = os.path.join(self.output_dir, MOSAIC_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"layer{self.layer:02d}.png")
+        cv2.imwrite(path, mosaic, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+        left = self.origin[0] - columns[0]
+        top = self.origin[1] - rows[0]
+        sections = [{"section": section,
+                     "x": round((left + x) / self.scale),
+                     "y": round((top + y) / self.scale),
+                     "response": round(response, 3)} for section, x, y, response in self.positions]
+        with open(os.path.join(directory, f"layer{self.layer:02d}.json"), "w") as f:
+            json.dump({"layer": self.layer, "scale": self.scale, "sections": sections}, f, indent=2)
+        self.written = self.count
+        if self.sections and self.count < self.sections:
+            log.warning("Mosaic of layer %s has %d of %d section(s).", self.layer, self.count, self.sections)
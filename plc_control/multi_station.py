@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .logs import get_logger
+from .station import Station
+from .station_daemon import StationDaemon
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# MultiStation Class
+# =========================
+
+class MultiStation:
+    """Serve several inspection cells from one process.
+
+    Every station keeps its own serial port, camera, handshake state,
+    output directory and progress bars, and is controlled through its own
+    station daemon socket. All stations run on one asyncio event loop (each
+    serial port is an ``add_reader`` callback, so nobody blocks in
+    ``read_until``) and share one encode/write pool sized to the CPU count.
+    """
+
+    def __init__(self, configs, writer_workers=None):
+        self.configs = configs
+        self.writer_workers = writer_workers or os.cpu_count() or 1
+        self.writer_executor = None
+        self.stations = []
+        self.daemons = []
+
+    def open(self):
+        """Open every station and create its daemon."""
+        self.writer_executor = ThreadPoolExecutor(max_workers=self.writer_workers, thread_name_prefix="image-writer")
+        for index, config in enumerate(self.configs):
+            station = Station(config, writer_executor=self.writer_executor, progress_position=2 * index)
+            self.stations.append(station)
+            station.open()
+            os.makedirs(config["output"]["root"], exist_ok=True)
+            self.daemons.append(StationDaemon(station.serial, station.camera, station.create_handler,
+                                              socket_path=config["socket"]))
+            log.info("Station %s: %s, camera %s, output %s", station.name, config["serial"]["port"],
+                     config["camera"]["device"], config["output"]["root"])
+        log.info("%d station(s) sharing %d image writer thread(s).", len(self.stations), self.writer_workers)
+        return self
+
+    async def serve(self):
+        """Run all station daemons until each of them is stopped."""
+        await asyncio.gather(*(daemon.serve() for daemon in self.daemons))
+
+    def close(self):
+        for station in self.stations:
+            station.close()
+        self.stations = []
+        self.daemons = []
+        if self.writer_executor is not None:
+            self.writer_executor.shutdown(wait=True)
+            self.writer_executor = None
+
+
+# =========================
+# Main Function
+# =========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control multi",
+                                     description="Drive several PLC/camera stations from one process.")
+    parser.add_argument("--config", required=True, help="Config file with a \"stations\" list (JSON).")
+    parser.add_argument("--workers", type=int, help="Shared image writer threads (default: CPU count).")
+    args = parser.parse_args(argv)
+
+    from .config import load_station_configs
+    from .logs import setup_logging
+
+    configs = load_station_configs(args.config)
+    setup_logging(configs[0]["logging"])  # One process, one log; taken from the shared keys
+    multi = MultiStation(configs, writer_workers=args.workers)
+    try:
+        multi.open()
+        asyncio.run(multi.serve())
+    except KeyboardInterrupt:
+        log.info("Multi-station mode interrupted.")
+    finally:
+        multi.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import random
+import struct
+import time
+from collections import namedtuple
+
+
+# =========================
+# PLC Serial Protocol
+# =========================
+#
+# Frames from the PLC are little-endian 16-bit words followed by b'\r\n':
+#   6 bytes  command, layer, section     e.g. 90 01 01 00 01 00 0d 0a
+#   2 bytes  command only                e.g. bc 02 0d 0a (finish, 700)
+#   longer   command, layer, section, extra words (extras are ignored)
+
+Command = namedtuple("Command", ["command", "layer", "section"])
+
+TERMINATOR = b"\r\n"
+KNOWN_COMMANDS = frozenset((300, 400, 500, 600, 700))
+
+_WORD = struct.Struct("<H")
+_LAYER_SECTION = struct.Struct("<HH")
+_CR, _LF = TERMINATOR
+
+
+class FrameParser:
+    """Incremental parser for the PLC byte stream.
+
+    Bytes are appended to one reusable ``bytearray`` and decoded in place with
+    ``struct.unpack_from``; no per-frame slices or word lists are built.
+    Frames are located by their fixed word layout rather than by splitting on
+    ``\\r\\n``, so a payload word containing 0x0D 0x0A does not break a frame.
+    A partial frame stays buffered until the rest arrives, unless a complete
+    frame or a misplaced terminator shows up after it, which means a byte of
+    it was lost; bytes that cannot start a valid frame are skipped until the
+    stream lines up again.
+    """
+
+    def __init__(self, known_commands=KNOWN_COMMANDS, max_frame_len=32):
+        self.known_commands = known_commands
+        self.max_frame_len = max_frame_len
+        self.buffer = bytearray()
+        self._pos = 0
+        self.frames = 0
+        self.discarded_bytes = 0
+
+    def feed(self, data):
+        """Append raw bytes received from the serial port."""
+        if self._pos:
+            del self.buffer[:self._pos]  # bytearray trims its head without reallocating
+            self._pos = 0
+        self.buffer += data
+
+    def reset(self):
+        """Drop any buffered partial frame."""
+        self.discarded_bytes += len(self.buffer) - self._pos
+        self.buffer.clear()
+        self._pos = 0
+
+    def next_command(self):
+        """Return the next complete ``Command``, or None if more bytes are needed."""
+        buf = self.buffer
+        end = len(buf)
+        pos = self._pos
+        known = self.known_commands
+        try:
+            while pos + 4 <= end:
+                command = _WORD.unpack_from(buf, pos)[0]
+                if known is not None and command not in known:
+                    pos += 1
+                    self.discarded_bytes += 1
+                    continue
+
+                if pos + 8 <= end and buf[pos + 6] == _CR and buf[pos + 7] == _LF:
+                    layer, section = _LAYER_SECTION.unpack_from(buf, pos + 2)
+                    pos += 8
+                    self.frames += 1
+                    return Command(command, layer, section)
+
+                if buf[pos + 2] == _CR and buf[pos + 3] == _LF:
+                    pos += 4
+                    self.frames += 1
+                    return Command(command, None, None)
+
+                if pos + 8 > end:
+                    resync = self._resync_point(buf, pos, end)
+                    if resync is None:
+                        return None  # Could still become a 6-byte frame
+                    self.discarded_bytes += resync - pos
+                    pos = resync
+                    continue
+
+                # Longer frame: terminator at an even offset past the third word
+                frame_end = pos + 8
+                limit = min(end - 1, pos + self.max_frame_len)
+                while frame_end < limit:
+                    if buf[frame_end] == _CR and buf[frame_end + 1] == _LF:
+                        layer, section = _LAYER_SECTION.unpack_from(buf, pos + 2)
+                        pos = frame_end + 2
+                        self.frames += 1
+                        return Command(command, layer, section)
+                    frame_end += 2
+                if end - pos < self.max_frame_len + 2:
+                    resync = self._resync_point(buf, pos, end)
+                    if resync is None:
+                        return None  # Terminator may still be on its way
+                    self.discarded_bytes += resync - pos
+                    pos = resync
+                    continue
+
+                pos += 1  # Not a frame start; resynchronize on the next byte
+                self.discarded_bytes += 1
+            return None
+        finally:
+            self._pos = pos
+
+    def _resync_point(self, buf, pos, end):
+        """Where to restart if the incomplete frame at ``pos`` is already broken, else None.
+
+        A complete frame starting later, or a terminator at an odd offset past
+        the 6-byte layout, means the frame at ``pos`` lost a byte. The PLC only
+        resends after its ack timeout, so waiting for the missing byte would
+        hold back the resends that are already buffered.
+        """
+        known = self.known_commands
+        for start in range(pos + 1, end - 1):
+            if start - pos >= 7 and (start - pos) % 2 and buf[start] == _CR and buf[start + 1] == _LF:
+                return start + 2
+            if start + 4 > end or (known is not None and _WORD.unpack_from(buf, start)[0] not in known):
+                continue
+            if buf[start + 2] == _CR and buf[start + 3] == _LF:
+                return start
+            if start + 8 <= end and buf[start + 6] == _CR and buf[start + 7] == _LF:
+                return start
+        return None
+
+    def parse(self, data):
+        """Feed ``data`` and yield every complete command it finishes."""
+        self.feed(data)
+        command = self.next_command()
+        while command is not None:
+            yield command
+            command = self.next_command()
+
+
+def encode_command(command, layer=None, section=None):
+    """Build the raw bytes of a PLC frame; omit layer/section for a 2-byte frame."""
+    if layer is None:
+        return _WORD.pack(command) + TERMINATOR
+    return struct.pack("<HHH", command, layer, section) + TERMINATOR
+
+
+# =========================
+# Replay Throughput Check
+# =========================
+
+def build_replay_stream(layers, repeats=1, garbage_every=0, seed=0):
+    """Build a byte stream of a full recipe, optionally with line noise between frames."""
+    rng = random.Random(seed)
+    stream = bytearray()
+    expected = 0
+    for _ in range(repeats):
+        for layer_index, total_sections in enumerate(layers, start=1):
+            for section in range(1, total_sections + 1):
+                stream += encode_command(400, layer_index, section)
+                expected += 1
+                if garbage_every and expected % garbage_every == 0:
+                    stream += bytes(rng.randrange(256) for _ in range(rng.randint(1, 5)))
+        stream += encode_command(700)
+        expected += 1
+    return bytes(stream), expected
+
+
+def replay(stream, chunk_sizes=(1, 3, 7, 64, 512), seed=0):
+    """Feed ``stream`` in randomly sized chunks and return (commands, seconds, parser)."""
+    rng = random.Random(seed)
+    parser = FrameParser()
+    commands = 0
+    start = time.perf_counter()
+    pos = 0
+    while pos < len(stream):
+        size = rng.choice(chunk_sizes)
+        for _ in parser.parse(stream[pos:pos + size]):
+            commands += 1
+        pos += size
+    return commands, time.perf_counter() - start, parser
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control parser-bench",
+                                     description="Replay a synthetic PLC byte stream through FrameParser.")
+    parser.add_argument("--repeats", type=int, default=300, help="Number of full 334-section recipes.")
+    parser.add_argument("--garbage-every", type=int, default=0, help="Insert line noise after every N frames.")
+    args = parser.parse_args(argv)
+
+    layers = [1, 8, 12, 18, 24, 30, 36, 40, 45, 60, 60]
+    stream, expected = build_replay_stream(layers, args.repeats, args.garbage_every)
+    commands, seconds, frame_parser = replay(stream)
+    print(f"Bytes      : {len(stream)}")
+    print(f"Commands   : {commands}/{expected}")
+    print(f"Discarded  : {frame_parser.discarded_bytes} byte(s)")
+    print(f"Throughput : {commands / seconds:,.0f} frames/s ({len(stream) / seconds / 1e6:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
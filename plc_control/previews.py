@@ -0,0 +1,148 @@
+import os
+import queue
+import sys
+import threading
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+PREVIEW_DIR = "previews"
+THUMBNAIL_DIR = "thumbnails"
+CONTACT_SHEET_DIR = "contact_sheets"
+
+
+# =========================
+# PreviewWriter Class
+# =========================
+
+class PreviewWriter:
+    """Write a preview, a thumbnail and per-layer contact sheets from in-memory frames.
+
+    Runs on one background thread at the lowest CPU priority. ``submit`` never
+    blocks: when ``max_queued`` frames are already waiting, the preview for
+    that section is skipped, so browsing aids can never delay an ack. The
+    preview is downscaled from the full frame in ``submit``, so the queue
+    never holds a (pooled) camera frame, and the thumbnail from the preview
+    (a two-level pyramid), so no image is decoded again. Files go to
+    ``previews/``, ``thumbnails/`` and ``contact_sheets/`` inside the
+    product directory, mirroring the names of the full images.
+    """
+
+    def __init__(self, preview_size=512, thumbnail_size=128, quality=85, contact_columns=10, max_queued=32):
+        self.preview_size = preview_size
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+        self.contact_columns = contact_columns
+        self.written = 0
+        self.skipped = 0
+        self.sheets = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._sheet_key = None
+        self._sheet_thumbnails = []
+        self._thread = threading.Thread(target=self._run, name="preview-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, output_dir, save_path, layer, section, frame):
+        """Queue previews for a captured frame; returns False if it was skipped.
+
+        ``layer`` is the 1-based layer number used to name the contact sheet.
+        Only the downscaled preview is queued; ``frame`` can be reused on return.
+        """
+        if self._queue.full():
+            self.skipped += 1
+            return False
+        preview = _downscale(frame, self.preview_size)
+        if preview is frame:
+            preview = frame.copy()  # Tiny frames are not downscaled at all
+        try:
+            self._queue.put_nowait((output_dir, save_path, layer, section, preview))
+            return True
+        except queue.Full:
+            self.skipped += 1
+            return False
+
+    def _run(self):
+        if sys.platform.startswith("linux"):
+            try:
+                # Linux applies the nice value to this thread only; elsewhere it would renice the whole process
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except (AttributeError, OSError):
+                pass
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._write_previews(*item)
+            except Exception as e:
+                log.error("Failed to write preview for layer %s section %s: %s", item[2], item[3], e)
+        self._write_contact_sheet()
+
+    def _write_previews(self, output_dir, save_path, layer, section, preview):
+        import cv2
+
+        if (output_dir, layer) != self._sheet_key:
+            self._write_contact_sheet()
+            self._sheet_key = (output_dir, layer)
+
+        name = os.path.splitext(os.path.relpath(save_path, output_dir))[0] + ".jpg"
+        thumbnail = _downscale(preview, self.thumbnail_size)
+        params = [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        for directory, image in ((PREVIEW_DIR, preview), (THUMBNAIL_DIR, thumbnail)):
+            path = os.path.join(output_dir, directory, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not cv2.imwrite(path, image, params):
+                raise IOError(f"could not write {path}")
+        self._sheet_thumbnails.append((section, thumbnail))
+        self.written += 1
+
+    def _write_contact_sheet(self):
+        """Tile the thumbnails of the finished layer into one labelled image."""
+        if not self._sheet_thumbnails:
+            return
+        import cv2
+        import numpy as np
+
+        output_dir, layer = self._sheet_key
+        thumbnails, self._sheet_thumbnails = self._sheet_thumbnails, []
+        height = max(thumbnail.shape[0] for _, thumbnail in thumbnails)
+        width = max(thumbnail.shape[1] for _, thumbnail in thumbnails)
+        columns = min(self.contact_columns, len(thumbnails))
+        rows = -(-len(thumbnails) // columns)
+        sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+        for index, (section, thumbnail) in enumerate(thumbnails):
+            if thumbnail.ndim == 2:
+                thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_GRAY2BGR)
+            top = (index // columns) * height
+            left = (index % columns) * width
+            sheet[top:top + thumbnail.shape[0], left:left + thumbnail.shape[1]] = thumbnail[..., :3]
+            cv2.putText(sheet, str(section), (left + 4, top + 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1,
+                        cv2.LINE_AA)
+        path = os.path.join(output_dir, CONTACT_SHEET_DIR, f"layer{layer:02d}.jpg")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        cv2.imwrite(path, sheet, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        self.sheets += 1
+
+    def close(self):
+        """Finish queued previews and the last contact sheet."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        log.info("Previews: %d written, %d skipped, %d contact sheet(s)", self.written, self.skipped, self.sheets)
+
+
+def _downscale(image, size):
+    """Resize so the longer side is ``size`` pixels (never upscales)."""
+    import cv2
+
+    height, width = image.shape[:2]
+    scale = size / max(height, width)
+    if scale >= 1:
+        return image
+    return cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                      interpolation=cv2.INTER_AREA)
@@ -0,0 +1,104 @@
+import csv
+import threading
+import time
+from collections import namedtuple
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# QualityGate Class
+# =========================
+
+QualityResult = namedtuple("QualityResult", ["passed", "sharpness", "dark", "bright", "seconds", "reason"])
+
+
+class QualityGate:
+    """Reject blurred or badly exposed frames before they are acknowledged.
+
+    Scores are computed on a decimated grayscale copy of the frame (every
+    ``decimate``-th row and column): sharpness is the variance of the
+    Laplacian, exposure is the fraction of pixels clipped to black
+    (<= ``dark_level``) or white (>= ``bright_level``). If a check takes
+    longer than ``budget_ms`` the decimation is doubled for the following
+    frames, so the gate never costs more than a few milliseconds per
+    capture. Every check is appended to ``log_path`` (CSV) when given.
+    """
+
+    def __init__(self, min_sharpness=50.0, max_dark=0.05, max_bright=0.05, decimate=4, budget_ms=5.0,
+                 retries=2, dark_level=2, bright_level=253, log_path=None):
+        self.min_sharpness = min_sharpness
+        self.max_dark = max_dark
+        self.max_bright = max_bright
+        self.decimate = decimate
+        self.budget = budget_ms / 1000.0
+        self.retries = retries  # Extra grabs before the section is failed with 600
+        self.dark_level = dark_level
+        self.bright_level = bright_level
+        self.checked = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._file = None
+        self._csv = None
+        if log_path:
+            self._file = open(log_path, "w", newline="")
+            self._csv = csv.writer(self._file)
+            self._file.write(f"# min_sharpness={min_sharpness} max_dark={max_dark} max_bright={max_bright} "
+                             f"dark_level={dark_level} bright_level={bright_level}\n")
+            self._csv.writerow(["layer", "section", "attempt", "sharpness", "dark", "bright", "passed", "ms",
+                                "decimate"])
+
+    def check(self, frame, layer=None, section=None, attempt=0):
+        """Score ``frame`` and return a ``QualityResult``."""
+        import cv2
+
+        started = time.perf_counter()
+        decimate = self.decimate
+        small = frame[::decimate, ::decimate]
+        if small.ndim == 3:
+            gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)  # Also makes the strided view contiguous
+        else:
+            gray = small.copy()
+        _, stddev = cv2.meanStdDev(cv2.Laplacian(gray, cv2.CV_16S))
+        sharpness = float(stddev[0, 0]) ** 2
+        histogram = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel()
+        pixels = gray.size
+        dark = float(histogram[:self.dark_level + 1].sum()) / pixels
+        bright = float(histogram[self.bright_level:].sum()) / pixels
+        seconds = time.perf_counter() - started
+
+        reason = None
+        if dark > self.max_dark:
+            reason = f"{dark:.1%} of pixels black (max {self.max_dark:.1%})"
+        elif bright > self.max_bright:
+            reason = f"{bright:.1%} of pixels white (max {self.max_bright:.1%})"
+        elif sharpness < self.min_sharpness:
+            reason = f"sharpness {sharpness:.1f} < {self.min_sharpness}"
+        result = QualityResult(reason is None, sharpness, dark, bright, seconds, reason)
+
+        with self._lock:
+            self.checked += 1
+            if reason is not None:
+                self.rejected += 1
+            if seconds > self.budget and decimate == self.decimate:
+                self.decimate = decimate * 2
+                log.warning("Quality gate took %.1f ms, decimating by %d from now on.", seconds * 1000,
+                            self.decimate)
+            if self._csv is not None:
+                self._csv.writerow([layer, section, attempt, f"{sharpness:.2f}", f"{dark:.5f}", f"{bright:.5f}",
+                                    int(result.passed), f"{seconds * 1000:.3f}", decimate])
+        return result
+
+    def summary(self):
+        return f"Quality gate: {self.checked} frame(s) checked, {self.rejected} rejected"
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self.checked:
+            log.info(self.summary())
@@ -0,0 +1,89 @@
+import logging
+import time
+
+import serial
+
+from .logs import get_logger
+from .plc_protocol import FrameParser
+
+
+log = get_logger(__name__)
+
+
+# =========================
+# SerialController Class
+# =========================
+
+class SerialController:
+    def __init__(self, port_name='/dev/ttyUSB0', baudrate=9600, parity=serial.PARITY_ODD,
+                 stopbits=serial.STOPBITS_ONE, bytesize=serial.EIGHTBITS, timeout=1,
+                 rtscts=False, xonxoff=False):
+        #print("Initializing SerialController...")  # Debugging statement
+        self.parser = FrameParser()
+        self.read_errors = 0
+        self.serial_port = self._initialize_serial(
+            port_name, baudrate, parity, stopbits, bytesize, timeout, rtscts, xonxoff
+        )
+        if self.serial_port is None:
+            raise Exception("Failed to establish serial connection.")
+
+    def _initialize_serial(self, port_name, baudrate, parity, stopbits, bytesize, timeout, rtscts, xonxoff, retries=3):
+        for attempt in range(retries):
+            try:
+                ser = serial.Serial(
+                    port=port_name, baudrate=baudrate, parity=parity,
+                    stopbits=stopbits, bytesize=bytesize, timeout=timeout,
+                    rtscts=rtscts, xonxoff=xonxoff
+                )
+                if ser.is_open:
+                    ser.reset_input_buffer()
+                    ser.reset_output_buffer()
+                    try:
+                        ser.dtr = False
+                        time.sleep(0.1)
+                        ser.dtr = True
+                    except (OSError, serial.SerialException):
+                        pass  # Pseudo-terminals (socat, openpty) have no DTR line
+                    #print(f"Serial port {port_name} successfully opened.")
+                    return ser
+            except Exception as e:
+                log.error("SerialController Attempt %d: %s", attempt + 1, e)
+                time.sleep(1)
+        log.error("SerialController failed to initialize after multiple attempts.")
+        return None
+
+    def write_data(self, data):
+        log.debug("Sent %d", data)
+        try:
+            self.serial_port.write(data.to_bytes(2, byteorder='little'))  # Send data
+            self.serial_port.flush()  # Ensure the data is actually transmitted
+        except Exception as e:
+            raise Exception(f"[ERROR] Failed to send data to PLC: {e}")
+
+
+    def read_data(self):
+        """Return the next (command, layer, section) from the PLC, or (None, None, None) on timeout.
+
+        2-byte frames such as the bc02 finish come back with layer and section set to None.
+        """
+        try:
+            command = self.parser.next_command()
+            while command is None:
+                data = self.serial_port.read(self.serial_port.in_waiting or 1)
+                if not data:
+                    return None, None, None  # Timeout; a partial frame stays buffered
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Raw byte stream: %s", data.hex(" "))
+                self.parser.feed(data)
+                command = self.parser.next_command()
+            log.debug("Command %s layer %s section %s", *command)
+            return command
+        except Exception as e:
+            self.read_errors += 1
+            log.error("Failed to read data: %s", e)
+            return None, None, None
+
+    def close(self):
+        if self.serial_port and self.serial_port.is_open:
+            self.serial_port.close()
+            log.info("Serial port closed.")
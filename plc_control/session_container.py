@@ -0,0 +1,207 @@
+import argparse
+import os
+import struct
+import time
+
+import numpy as np
+
+
+# =========================
+# SessionContainer Class
+# =========================
+#
+# File layout (little endian):
+#   header   HEADER_SIZE bytes, see HEADER_FORMAT
+#   index    slot_count entries of INDEX_DTYPE, maps (layer, section) -> slot; layer is the 1-based
+#            layer number of the file names (version 1 stored the raw PLC layer word)
+#   data     slot_count frames of height x width x channels, page aligned
+
+MAGIC = b"PLCSESS1"
+VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)
+HEADER_FORMAT = "<8sHIIIIc64sQQ"
+HEADER_SIZE = 128
+PAGE_SIZE = 4096
+EXTENSION = ".plcs"
+
+INDEX_DTYPE = np.dtype([
+    ("layer", "<i4"),
+    ("section", "<i4"),
+    ("filled", "<u4"),
+    ("timestamp", "<f8"),
+])
+
+
+def _align(value, alignment=PAGE_SIZE):
+    return (value + alignment - 1) // alignment * alignment
+
+
+class SessionContainer:
+    """All frames of one product run in a single preallocated, memory-mapped file.
+
+    Frames are copied straight into fixed slots of the mapping, so a capture
+    costs one memcpy instead of an open/encode/write/close cycle, and a
+    finished product can be loaded downstream with a single mmap.
+    """
+
+    def __init__(self, path, header, mode):
+        self.path = path
+        self.mode = mode
+        self.version = header["version"]
+        self.product_id = header["product_id"]
+        self.slot_count = header["slot_count"]
+        self.frame_shape = header["frame_shape"]
+        self.dtype = np.dtype(header["dtype"])
+        self.index = np.memmap(path, dtype=INDEX_DTYPE, mode=mode,
+                               offset=header["index_offset"], shape=(self.slot_count,))
+        self.frames = np.memmap(path, dtype=self.dtype, mode=mode,
+                                offset=header["data_offset"], shape=(self.slot_count,) + self.frame_shape)
+        self.slots = {}
+        for slot in np.flatnonzero(self.index["filled"]):
+            entry = self.index[slot]
+            self.slots[(int(entry["layer"]), int(entry["section"]))] = int(slot)
+
+    @classmethod
+    def create(cls, path, slot_count, frame_shape, dtype=np.uint8, product_id=""):
+        """Preallocate a container for ``slot_count`` frames of ``frame_shape``."""
+        frame_shape = tuple(int(n) for n in frame_shape)
+        if len(frame_shape) == 2:
+            frame_shape += (1,)
+        dtype = np.dtype(dtype)
+        index_offset = HEADER_SIZE
+        data_offset = _align(index_offset + slot_count * INDEX_DTYPE.itemsize)
+        total_size = data_offset + slot_count * int(np.prod(frame_shape)) * dtype.itemsize
+
+        header = struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, slot_count, frame_shape[0], frame_shape[1], frame_shape[2],
+            dtype.char.encode("ascii"), product_id.encode("utf-8")[:64], index_offset, data_offset,
+        )
+        with open(path, "wb") as f:
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            f.truncate(total_size)  # Sparse preallocation; pages are filled as frames arrive
+        return cls(path, cls._read_header(path), mode="r+")
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        """Open an existing container, read-only by default."""
+        return cls(path, cls._read_header(path), mode=mode)
+
+    @staticmethod
+    def _read_header(path):
+        with open(path, "rb") as f:
+            raw = f.read(struct.calcsize(HEADER_FORMAT))
+        (magic, version, slot_count, height, width, channels, dtype_char,
+         product_id, index_offset, data_offset) = struct.unpack(HEADER_FORMAT, raw)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a session container.")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported session container version {version}.")
+        return {
+            "version": version,
+            "slot_count": slot_count,
+            "frame_shape": (height, width, channels),
+            "dtype": dtype_char.decode("ascii"),
+            "product_id": product_id.rstrip(b"\0").decode("utf-8"),
+            "index_offset": index_offset,
+            "data_offset": data_offset,
+        }
+
+    def write(self, layer, section, frame, timestamp=None):
+        """Copy ``frame`` into the slot for (layer, section) and return the slot number."""
+        key = (int(layer), int(section))
+        slot = self.slots.get(key)
+        if slot is None:
+            if len(self.slots) >= self.slot_count:
+                raise IndexError(f"Session container is full ({self.slot_count} slots).")
+            slot = len(self.slots)
+        target = self.frames[slot]
+        if frame.shape != target.shape and frame.reshape(-1).size == target.size:
+            frame = frame.reshape(target.shape)  # Single-channel frames arrive without a channel axis
+        if frame.shape != target.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match container slot {target.shape}.")
+        target[...] = frame
+        self.index["layer"][slot], self.index["section"][slot] = key
+        self.index["timestamp"][slot] = time.time() if timestamp is None else timestamp
+        self.index["filled"][slot] = 1  # Set last so a half-written slot is never indexed
+        self.slots[key] = slot
+        return slot
+
+    def read(self, layer, section):
+        """Return the frame for (layer, section) as a view into the mapping."""
+        slot = self.slots.get((int(layer), int(section)))
+        if slot is None:
+            raise KeyError(f"No frame stored for layer {layer} section {section}.")
+        return self.frames[slot]
+
+    def __contains__(self, key):
+        return tuple(key) in self.slots
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __iter__(self):
+        """Yield (layer, section, frame) in capture order."""
+        for (layer, section), slot in sorted(self.slots.items(), key=lambda item: item[1]):
+            yield layer, section, self.frames[slot]
+
+    def flush(self):
+        self.frames.flush()
+        self.index.flush()
+
+    def close(self):
+        if self.mode != "r":
+            self.flush()
+        del self.frames
+        del self.index
+
+
+# =========================
+# Export Tool
+# =========================
+
+def export_pngs(container_path, output_dir, level=3):
+    """Write every frame of a container back out as individual PNG files."""
+    import cv2
+
+    container = SessionContainer.open(container_path)
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = container.product_id or os.path.splitext(os.path.basename(container_path))[0]
+    count = 0
+    for layer, section, frame in container:
+        layer_number = layer + 1 if container.version == 1 else layer  # Version 1: merged-variant PLC word
+        file_name = f"{prefix}-layer{layer_number:02d}-section{section:02d}.png"
+        if not cv2.imwrite(os.path.join(output_dir, file_name), np.asarray(frame),
+                           [cv2.IMWRITE_PNG_COMPRESSION, level]):
+            print(f"[ERROR] Failed to export layer {layer} section {section}.")
+            continue
+        count += 1
+    container.close()
+    print(f"[INFO] Exported {count} image(s) to {output_dir}")
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control container", description="Inspect or export a session container.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    info_parser = subparsers.add_parser("info", help="Show the container header and fill state.")
+    info_parser.add_argument("container")
+
+    export_parser = subparsers.add_parser("export", help="Export all frames as PNG files.")
+    export_parser.add_argument("container")
+    export_parser.add_argument("output_dir")
+    export_parser.add_argument("--level", type=int, default=3, help="PNG compression level (0-9).")
+
+    args = parser.parse_args(argv)
+    if args.action == "info":
+        container = SessionContainer.open(args.container)
+        print(f"Product ID : {container.product_id}")
+        print(f"Frame shape: {container.frame_shape} {container.dtype}")
+        print(f"Slots used : {len(container)}/{container.slot_count}")
+        container.close()
+    elif args.action == "export":
+        export_pngs(args.container, args.output_dir, args.level)
+
+
+if __name__ == "__main__":
+    main()
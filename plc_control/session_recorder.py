@@ -0,0 +1,413 @@
+import argparse
+import json
+import queue
+import struct
+import threading
+import time
+
+from .logs import get_logger
+from .plc_protocol import FrameParser
+
+
+log = get_logger(__name__)
+
+
+MAGIC = b"PLCREC01"
+EXTENSION = ".plcrec"
+RECORD_HEADER = struct.Struct("<cdI")  # kind, seconds since the recording started, payload length
+FLUSH_FORMAT = struct.Struct("<Hd")  # frames flushed, seconds spent
+GRAB_FORMAT = struct.Struct("<d")  # seconds spent in grab_frame, followed by the PNG payload
+
+SERIAL_READ = b"R"  # Raw bytes returned by the serial port
+SERIAL_WRITE = b"W"  # Raw bytes written to the serial port (acks)
+CAMERA_FLUSH = b"C"  # One flush_camera_buffer call
+CAMERA_FRAME = b"F"  # One frame returned by grab_frame
+
+
+# =========================
+# SessionRecorder Class
+# =========================
+
+class SessionRecorder:
+    """Record everything a production run receives to one compact log file.
+
+    ``attach`` wraps the serial port and the camera controller: every chunk of
+    raw serial bytes read or written, every buffer flush and every frame
+    handed to the controller is logged with its time since the start of the
+    recording. Frames are stored as PNG (zlib level 1, lossless) unless
+    ``record_frames`` is False. Records are written by a background thread so
+    the capture path only pays for queueing them.
+    """
+
+    def __init__(self, path, metadata=None, record_frames=True, max_queued=16):
+        self.path = path
+        self.record_frames = record_frames
+        self.records = 0
+        self.frames = 0
+        self.start = time.monotonic()
+        self._file = open(path, "wb")
+        header = dict(metadata or {}, started=time.time(), record_frames=record_frames)
+        encoded = json.dumps(header).encode("utf-8")
+        self._file.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        self._queue = queue.Queue(maxsize=max_queued)  # Blocks the capture path rather than dropping records
+        self._camera = None
+        self._thread = threading.Thread(target=self._run, name="session-recorder", daemon=True)
+        self._thread.start()
+
+    def attach(self, serial_controller, camera_controller):
+        """Start recording the traffic of ``serial_controller`` and ``camera_controller``."""
+        serial_controller.serial_port = RecordingPort(serial_controller.serial_port, self)
+
+        self._camera = camera_controller
+        grab_frame = camera_controller.grab_frame
+        flush_camera_buffer = camera_controller.flush_camera_buffer
+
+        def recording_grab_frame(newer_than=None):
+            started = time.monotonic()
+            frame = grab_frame(newer_than)
+            if frame is not None:
+                self.record_frame(frame, time.monotonic() - started)
+            return frame
+
+        def recording_flush(num_frames=15):
+            started = time.monotonic()
+            flush_camera_buffer(num_frames=num_frames)
+            self.record(CAMERA_FLUSH, FLUSH_FORMAT.pack(num_frames, time.monotonic() - started))
+
+        camera_controller.grab_frame = recording_grab_frame
+        camera_controller.flush_camera_buffer = recording_flush
+        log.info("Recording session to %s", self.path)
+
+    def record(self, kind, payload=b""):
+        self._queue.put((kind, time.monotonic() - self.start, payload))
+
+    def record_frame(self, frame, grab_seconds):
+        if self.record_frames and self._camera is not None:
+            self._camera.retain_frame(frame)  # Pooled buffer stays ours until it is encoded
+        self._queue.put((CAMERA_FRAME, time.monotonic() - self.start, (frame, grab_seconds)))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, timestamp, payload = item
+            if kind == CAMERA_FRAME:
+                frame = payload[0]
+                payload = self._encode_frame(*payload)
+                if self.record_frames and self._camera is not None:
+                    self._camera.release_frame(frame)
+                self.frames += 1
+            self._file.write(RECORD_HEADER.pack(kind, timestamp, len(payload)))
+            self._file.write(payload)
+            self.records += 1
+
+    def _encode_frame(self, frame, grab_seconds):
+        encoded = b""
+        if self.record_frames and hasattr(frame, "shape"):
+            import cv2
+
+            ok, buffer = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+            if ok:
+                encoded = buffer.tobytes()
+        return GRAB_FORMAT.pack(grab_seconds) + encoded
+
+    def close(self):
+        """Write out queued records and close the log."""
+        if self._file is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._file = None
+        log.info("Recorded %d record(s), %d frame(s) to %s", self.records, self.frames, self.path)
+
+
+class RecordingPort:
+    """Serial port proxy that logs every chunk read from or written to the port."""
+
+    def __init__(self, port, recorder):
+        self._port = port
+        self._recorder = recorder
+
+    def read(self, size=1):
+        data = self._port.read(size)
+        if data:
+            self._recorder.record(SERIAL_READ, data)
+        return data
+
+    def write(self, data):
+        written = self._port.write(data)
+        self._recorder.record(SERIAL_WRITE, bytes(data))
+        return written
+
+    def __getattr__(self, name):
+        return getattr(self._port, name)
+
+
+def _read_header(f, path):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise Exception(f"{path} is not a session recording.")
+    (length,) = struct.unpack("<I", f.read(4))
+    return json.loads(f.read(length).decode("utf-8"))
+
+
+def read_metadata(path):
+    """Return the metadata header of a recording."""
+    with open(path, "rb") as f:
+        return _read_header(f, path)
+
+
+def read_session(path, frame_offsets=False):
+    """Return ``(metadata, records)`` for a recording; ``records`` yields ``(kind, timestamp, payload)``.
+
+    With ``frame_offsets`` the pixels of frame records are skipped and their
+    payload is ``(grab_seconds, offset, size)`` of the PNG data in the file.
+    """
+    metadata = read_metadata(path)
+
+    def records():
+        with open(path, "rb") as f:
+            _read_header(f, path)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return  # End of file, or a recording cut short by a crash
+                kind, timestamp, size = RECORD_HEADER.unpack(header)
+                if frame_offsets and kind == CAMERA_FRAME:
+                    (grab_seconds,) = GRAB_FORMAT.unpack(f.read(GRAB_FORMAT.size))
+                    offset = f.tell()
+                    f.seek(size - GRAB_FORMAT.size, 1)
+                    yield kind, timestamp, (grab_seconds, offset, size - GRAB_FORMAT.size)
+                    continue
+                payload = f.read(size)
+                if len(payload) < size:
+                    return
+                yield kind, timestamp, payload
+
+    return metadata, records()
+
+
+# =========================
+# Replay Doubles
+# =========================
+
+class ReplaySerial:
+    """SerialController stand-in that collects the acks written during a replay."""
+
+    def __init__(self):
+        self.serial_port = self  # CommandHandler checks serial_port.is_open
+        self.is_open = True
+        self.written = []
+
+    def write_data(self, data):
+        self.written.append(data)
+
+    def close(self):
+        self.is_open = False
+
+
+class ReplayCamera:
+    """CameraController stand-in serving the recorded frames in order.
+
+    Flushes and grabs take their recorded duration divided by ``speed``
+    (``speed=0`` skips the waits), so camera time is reproduced while the
+    rest of the controller runs for real. ``frames`` holds the
+    ``(offset, size)`` of each PNG in ``path``; frames are decoded on demand.
+    """
+
+    def __init__(self, path, sink, frames, flush_seconds, grab_seconds, frame_shape, speed=1.0):
+        self.sink = sink
+        self.frames = frames
+        self._file = open(path, "rb")
+        self.flush_seconds = flush_seconds
+        self.grab_seconds = grab_seconds
+        self._frame_shape = tuple(frame_shape)
+        self.speed = speed
+        self.grabber = None
+        self._next_frame = 0
+        self._next_flush = 0
+        self._fallback = None
+
+    def frame_shape(self):
+        return self._frame_shape
+
+    def _wait(self, seconds):
+        if self.speed and seconds:
+            time.sleep(seconds / self.speed)
+
+    def flush_camera_buffer(self, num_frames=15):
+        if self._next_flush < len(self.flush_seconds):
+            self._wait(self.flush_seconds[self._next_flush])
+        self._next_flush += 1
+
+    def grab_frame(self, newer_than=None):
+        index = self._next_frame
+        self._next_frame += 1
+        if index < len(self.grab_seconds):
+            self._wait(self.grab_seconds[index])
+        if index < len(self.frames) and self.frames[index][1]:
+            import cv2
+            import numpy as np
+
+            offset, size = self.frames[index]
+            self._file.seek(offset)
+            data = np.frombuffer(self._file.read(size), dtype=np.uint8)
+            return cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+        return self._placeholder()
+
+    def _placeholder(self):
+        # Recorded without pixels (or past the end of the recording): keep the encode cost realistic
+        if self._fallback is None:
+            from .synthetic_camera import SyntheticCapture
+
+            height, width = self._frame_shape[:2]
+            self._fallback = SyntheticCapture("pattern", width, height, fps=0)
+        return self._fallback.read()[1]
+
+    def save_frame(self, save_path, frame):
+        return self.sink.write(save_path, frame)
+
+    def retain_frame(self, frame):
+        return frame
+
+    def release_frame(self, frame):
+        pass
+
+    def release(self):
+        self._file.close()
+
+
+# =========================
+# Replay Driver
+# =========================
+
+def load_replay(path):
+    """Split a recording into the serial script and the camera data needed for a replay."""
+    metadata, records = read_session(path, frame_offsets=True)
+    script = []  # (PLC delay before the chunk, raw bytes)
+    recorded_acks = []
+    frames, flush_seconds, grab_seconds = [], [], []
+    last_event = None
+    first = last = None
+    for kind, timestamp, payload in records:
+        first = timestamp if first is None else first
+        last = timestamp
+        if kind == SERIAL_READ:
+            # Time the PLC (stage move, resend) took since the controller's last read or ack
+            script.append((0.0 if last_event is None else timestamp - last_event, payload))
+            last_event = timestamp
+        elif kind == SERIAL_WRITE:
+            recorded_acks.extend(int.from_bytes(payload[i:i + 2], byteorder='little')
+                                 for i in range(0, len(payload) - 1, 2))
+            last_event = timestamp
+        elif kind == CAMERA_FLUSH:
+            flush_seconds.append(FLUSH_FORMAT.unpack(payload)[1])
+        elif kind == CAMERA_FRAME:
+            grab_seconds.append(payload[0])
+            frames.append(payload[1:])
+    metadata["recorded_seconds"] = (last - first) if first is not None else 0.0
+    return metadata, script, recorded_acks, frames, flush_seconds, grab_seconds
+
+
+def replay(path, config, speed=1.0, product_id=None):
+    """Feed a recording through a CommandHandler built from ``config``; returns the replay summary.
+
+    ``speed`` scales the recorded PLC and camera times (2.0 replays twice as
+    fast); 0 replays at maximum speed.
+    """
+    from .image_sinks import make_sink
+    from .station import Station
+
+    metadata, script, recorded_acks, frames, flush_seconds, grab_seconds = load_replay(path)
+    station = Station(config)
+    serial_double = ReplaySerial()
+    station.serial = serial_double
+    station.camera = ReplayCamera(path, make_sink(config["output"]["sink"]), frames, flush_seconds, grab_seconds,
+                                  metadata.get("frame_shape", (2048, 2048, 3)), speed)
+    handler = station.create_handler(product_id or metadata.get("product_id") or "REPLAY",
+                                     metadata.get("username") or "replay")
+    print(f"[INFO] Replaying {len(script)} serial chunk(s), {len(frames)} frame(s) from {path} "
+          f"at {'max' if not speed else f'{speed:g}x'} speed")
+
+    parser = FrameParser()
+    started = time.monotonic()
+    try:
+        handler.handle_ready()
+        anchor = time.monotonic()
+        for delay, data in script:
+            if speed:
+                remaining = anchor + delay / speed - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+            for command in parser.parse(data):
+                handler.process_incoming_command(command.command, command.layer, command.section,
+                                                 time.monotonic())
+            anchor = time.monotonic()
+    except SystemExit:
+        pass  # 700 ends the run the same way as in production
+    finally:
+        handler.finish_writes()
+        handler.close_progress()
+        station.close()
+    elapsed = time.monotonic() - started
+
+    acks = serial_double.written
+    summary = {
+        "recorded_seconds": metadata["recorded_seconds"],
+        "replay_seconds": elapsed,
+        "speed": speed,
+        "captures": sum(1 for ack in acks if ack in (500, 600)),
+        "acks_match": acks == recorded_acks,
+        "ack_differences": (sum(1 for a, b in zip(acks, recorded_acks) if a != b)
+                            + abs(len(acks) - len(recorded_acks))),
+    }
+    return summary
+
+
+def print_summary(summary):
+    print(f"[INFO] Recorded run: {summary['recorded_seconds']:.2f} s, replay: {summary['replay_seconds']:.2f} s, "
+          f"{summary['captures']} capture(s)")
+    if summary["acks_match"]:
+        print("[INFO] Ack sequence matches the recording.")
+    else:
+        print(f"[WARNING] Ack sequence differs from the recording in {summary['ack_differences']} place(s).")
+
+
+# =========================
+# Main Function
+# =========================
+
+def parse_speed(value):
+    if value == "max":
+        return 0.0
+    return float(value.rstrip("x"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control replay",
+                                     description="Replay a recorded session through the command handler.")
+    parser.add_argument("recording", help=f"Session recording ({EXTENSION}) written by 'plc-control run --record'.")
+    parser.add_argument("--speed", type=parse_speed, default=1.0, help="1x, Nx (e.g. 4x) or max. Default: 1x.")
+    parser.add_argument("--config", help="Station config file (JSON); defaults to the recorded variant.")
+    parser.add_argument("--variant", help="Controller variant, overrides the recording and the config file.")
+    parser.add_argument("--output", help="Root directory for the replayed images (default: current directory).")
+    parser.add_argument("--product-id", help="Product ID for the replayed images (default: the recorded one).")
+    parser.add_argument("--json", help="Write the replay summary to this file.")
+    args = parser.parse_args(argv)
+
+    from .config import load_config
+
+    metadata = read_metadata(args.recording)
+    overrides = {"output": {"root": args.output}} if args.output else None
+    config = load_config(args.config, args.variant or metadata.get("variant"), overrides)
+
+    summary = replay(args.recording, config, args.speed, args.product_id)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
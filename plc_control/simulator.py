@@ -0,0 +1,260 @@
+import argparse
+import bisect
+import os
+import random
+import select
+import struct
+import time
+
+import serial
+
+
+# Define the layers and sections
+layers = [1, 8, 12, 18, 24, 30, 36, 40, 45, 60, 60]  # Sections per layer
+
+HISTOGRAM_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+# =========================
+# Transports
+# =========================
+
+class SerialTransport:
+    """Talk to the controller through a pyserial port (real or socat pty)."""
+
+    def __init__(self, ser):
+        self.ser = ser
+
+    def write(self, data):
+        self.ser.write(data)
+        self.ser.flush()
+
+    def read(self, size, timeout):
+        self.ser.timeout = timeout
+        return self.ser.read(size)
+
+    def close(self):
+        self.ser.close()
+
+
+class FdTransport:
+    """Talk to the controller through a raw file descriptor, e.g. the master side of os.openpty()."""
+
+    def __init__(self, fd):
+        self.fd = fd
+
+    def write(self, data):
+        os.write(self.fd, data)
+
+    def read(self, size, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        data = b""
+        while len(data) < size:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                break
+            data += os.read(self.fd, size - len(data))
+        return data
+
+    def close(self):
+        os.close(self.fd)
+
+
+# =========================
+# PLCSimulator Class
+# =========================
+
+class FaultConfig:
+    """Per-frame fault probabilities (0-1) and the delay before the final 700."""
+
+    def __init__(self, drop=0.0, split=0.0, duplicate=0.0, noise=0.0, late_exit=0.0):
+        self.drop = drop  # Drop one byte of the frame; the controller should not ack it
+        self.split = split  # Send the frame in two writes with a short gap
+        self.duplicate = duplicate  # Send the same 400 twice
+        self.noise = noise  # Put random garbage bytes on the line before the frame
+        self.late_exit = late_exit  # Seconds to wait before sending 700
+
+
+class PLCSimulator:
+    """Handshake-aware stand-in for the PLC.
+
+    Sends each 400 frame, waits for the controller's 500/600 ack (with a
+    timeout and resend), models the stage move between sections and can
+    inject line faults. Ack latencies and achieved cycle time are collected
+    for ``report``.
+    """
+
+    def __init__(self, transport, layers, ack_timeout=5.0, retries=2, move_time=0.0, layer_move_time=0.0,
+                 max_speed=False, faults=None, seed=0):
+        self.transport = transport
+        self.layers = layers
+        self.ack_timeout = ack_timeout
+        self.retries = retries
+        self.move_time = 0.0 if max_speed else move_time
+        self.layer_move_time = 0.0 if max_speed else layer_move_time
+        self.faults = faults or FaultConfig()
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.acks = {}
+        self.timeouts = 0
+        self.resends = 0
+        self.injected = {"drop": 0, "split": 0, "duplicate": 0, "noise": 0}
+        self.started = None
+        self.finished = None
+
+    def format_frame(self, command, layer_count=None, section_count=None):
+        """Convert integers to 16-bit little-endian words and append \\r\\n."""
+        if layer_count is None:
+            return struct.pack('<H', command) + b'\r\n'  # 2-byte finish frame, e.g. bc 02 0d 0a
+        return struct.pack('<HHH', command, layer_count, section_count) + b'\r\n'
+
+    def wait_for_ready(self, timeout=None):
+        """Block until the controller sends READY (300)."""
+        while True:
+            data = self.transport.read(2, timeout)
+            if len(data) < 2:
+                return False
+            if int.from_bytes(data, byteorder='little') == 300:
+                return True
+
+    def _send(self, frame):
+        """Write one frame, applying the configured faults."""
+        faults = self.faults
+        if faults.noise and self.rng.random() < faults.noise:
+            self.injected["noise"] += 1
+            self.transport.write(bytes(self.rng.randrange(256) for _ in range(self.rng.randint(1, 6))))
+        if faults.drop and self.rng.random() < faults.drop:
+            self.injected["drop"] += 1
+            index = self.rng.randrange(len(frame))
+            frame = frame[:index] + frame[index + 1:]
+        if faults.split and self.rng.random() < faults.split:
+            self.injected["split"] += 1
+            cut = self.rng.randint(1, len(frame) - 1)
+            self.transport.write(frame[:cut])
+            time.sleep(0.005)
+            self.transport.write(frame[cut:])
+        else:
+            self.transport.write(frame)
+
+    def _read_ack(self, timeout):
+        data = self.transport.read(2, timeout)
+        if len(data) < 2:
+            return None
+        return int.from_bytes(data, byteorder='little')
+
+    def send_section(self, layer_count, section_count):
+        """Send one 400 and wait for its ack, resending on timeout. Returns the ack or None."""
+        frame = self.format_frame(400, layer_count, section_count)
+        duplicate = self.faults.duplicate and self.rng.random() < self.faults.duplicate
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.resends += 1
+            sent = time.perf_counter()
+            self._send(frame)
+            if duplicate:
+                self.injected["duplicate"] += 1
+                self.transport.write(frame)
+            ack = self._read_ack(self.ack_timeout)
+            if ack is None:
+                self.timeouts += 1
+                continue
+            self.latencies.append(time.perf_counter() - sent)
+            self.acks[ack] = self.acks.get(ack, 0) + 1
+            if duplicate:
+                self._read_ack(self.ack_timeout)  # The controller acks the duplicate as well
+            return ack
+        print(f"[ERROR] No ack for layer {layer_count} section {section_count} after {self.retries + 1} attempt(s).")
+        return None
+
+    def run(self, layer_base=1, section_base=1):
+        """Run the full recipe and send the final 700."""
+        self.started = time.perf_counter()
+        for layer_index, total_sections in enumerate(self.layers, start=layer_base):
+            if layer_index != layer_base and self.layer_move_time:
+                time.sleep(self.layer_move_time)
+            for section_count in range(section_base, total_sections + section_base):
+                if self.move_time:
+                    time.sleep(self.move_time * self.rng.uniform(0.9, 1.1))  # Stage move with jitter
+                self.send_section(layer_index, section_count)
+        self.finished = time.perf_counter()
+
+        if self.faults.late_exit:
+            time.sleep(self.faults.late_exit)
+        self.transport.write(self.format_frame(700))
+        return self._read_ack(self.ack_timeout) == 700
+
+    def histogram(self):
+        """Return the ack-latency histogram as (upper bound in ms, count) pairs."""
+        counts = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for latency in self.latencies:
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS_MS, latency * 1000)] += 1
+        bounds = HISTOGRAM_BUCKETS_MS + [float("inf")]
+        return list(zip(bounds, counts))
+
+    def report(self):
+        sections = sum(self.layers)
+        elapsed = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        print(f"Sections      : {sections}")
+        print(f"Acks          : {dict(sorted(self.acks.items()))}")
+        print(f"Timeouts      : {self.timeouts} (resends {self.resends})")
+        print(f"Faults        : {self.injected}")
+        if sections and elapsed:
+            print(f"Cycle time    : {elapsed / sections * 1000:.1f} ms/section ({sections / elapsed:.2f} sections/s)")
+        if not self.latencies:
+            return
+        print("Ack latency   :")
+        peak = max(count for _, count in self.histogram()) or 1
+        for bound, count in self.histogram():
+            label = f"<= {bound:g} ms" if bound != float("inf") else f"> {HISTOGRAM_BUCKETS_MS[-1]} ms"
+            print(f"  {label:>12} {count:>5} {'#' * round(count / peak * 40)}")
+
+
+# =========================
+# Main Function
+# =========================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control simulate", description="Handshake-aware virtual PLC.")
+    parser.add_argument("--port", default="/dev/pts/5", help="Serial port to send on (socat pair).")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--parity", default=serial.PARITY_NONE, choices=["N", "E", "O"])
+    parser.add_argument("--layers", default=",".join(map(str, layers)),
+                        help="Comma-separated sections per layer.")
+    parser.add_argument("--ack-timeout", type=float, default=5.0, help="Seconds to wait for 500/600.")
+    parser.add_argument("--retries", type=int, default=2, help="Resends after an ack timeout.")
+    parser.add_argument("--move-time", type=float, default=1.0, help="Stage move time before each section (s).")
+    parser.add_argument("--layer-move-time", type=float, default=0.0, help="Extra move time between layers (s).")
+    parser.add_argument("--max-speed", action="store_true", help="No move time; send as soon as acked.")
+    parser.add_argument("--no-wait-ready", action="store_true", help="Start without waiting for READY (300).")
+    parser.add_argument("--drop", type=float, default=0.0, help="Probability of dropping a byte from a frame.")
+    parser.add_argument("--split", type=float, default=0.0, help="Probability of splitting a frame in two writes.")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="Probability of sending a 400 twice.")
+    parser.add_argument("--noise", type=float, default=0.0, help="Probability of garbage before a frame.")
+    parser.add_argument("--late-exit", type=float, default=0.0, help="Delay before the final 700 (s).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    ser = serial.Serial(args.port, baudrate=args.baudrate, parity=args.parity,
+                        stopbits=serial.STOPBITS_ONE, bytesize=serial.EIGHTBITS, timeout=1)
+    faults = FaultConfig(args.drop, args.split, args.duplicate, args.noise, args.late_exit)
+    simulator = PLCSimulator(SerialTransport(ser), [int(n) for n in args.layers.split(",")],
+                             ack_timeout=args.ack_timeout, retries=args.retries, move_time=args.move_time,
+                             layer_move_time=args.layer_move_time, max_speed=args.max_speed,
+                             faults=faults, seed=args.seed)
+    try:
+        if not args.no_wait_ready:
+            print("Waiting for READY (300) from the controller...")
+            simulator.wait_for_ready()
+        print("Starting automated VirtualPLC...")
+        simulator.run()
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopped by user.")
+    finally:
+        simulator.report()
+        ser.close()
+        print("Serial port closed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import os
+
+from .commands import BatchCommandHandler, CommandHandler
+from .image_commit import ImageCommitter
+
+
+# =========================
+# Station Class
+# =========================
+
+class Station:
+    """Serial port, camera and handler settings of one inspection cell, built from a config dict."""
+
+    def __init__(self, config, name=None, writer_executor=None, progress_position=0):
+        self.config = config
+        self.name = name or config.get("name") or config["variant"]
+        self.writer_executor = writer_executor  # Shared encode/write pool, None for a private one per product
+        self.progress_position = progress_position
+        self.serial = None
+        self.camera = None
+        self.metrics = None
+
+    def open(self):
+        """Open the serial port and the camera."""
+        from .image_sinks import make_sink
+        from .serial_controller import SerialController
+
+        serial_config = self.config["serial"]
+        self.serial = SerialController(port_name=serial_config["port"], baudrate=serial_config["baudrate"],
+                                       parity=serial_config["parity"], timeout=serial_config["timeout"])
+
+        camera_config = self.config["camera"]
+        sink = make_sink(self.config["output"]["sink"])
+        if camera_config["backend"] == "dummy":
+            from .camera_controller import DummyCameraController
+
+            self.camera = DummyCameraController(camera_config["device"], sink=sink)
+        elif camera_config["backend"] in ("opencv", "synthetic"):
+            from .camera_controller import CameraController
+
+            capture = None
+            if camera_config["backend"] == "synthetic":
+                from .synthetic_camera import SyntheticCapture
+
+                capture = SyntheticCapture(**camera_config["synthetic"])
+            pool = camera_config["pool"]
+            output = self.config["output"]
+            self.camera = CameraController(camera_config["device"], use_grabber=camera_config["grabber"],
+                                           grab_timeout=camera_config["grab_timeout"], sink=sink, capture=capture,
+                                           fresh_frames=camera_config["fresh_frames"], pool_frames=pool["frames"],
+                                           pool_max_mb=pool["max_mb"], pool_wait=pool["wait"],
+                                           pool_reserve=output["writer_pending"] if output["writer"] == "async" else 0)
+        else:
+            raise ValueError(f"Unknown camera backend '{camera_config['backend']}'.")
+
+        metrics_config = self.config["metrics"]
+        if metrics_config["enabled"]:
+            from .metrics import StationMetrics, serve_metrics
+
+            self.metrics = StationMetrics(self.name, self.config["output"]["root"] or os.getcwd())
+            self.metrics.serial = self.serial
+            self.metrics.camera = self.camera
+            serve_metrics(self.metrics, metrics_config["host"], metrics_config["port"])
+        return self
+
+    def create_handler(self, product_id=None, username=None, image_writer=None):
+        """Create the command handler for one product run.
+
+        ``image_writer`` overrides the writer built from the config, e.g. to
+        share one pool between stations.
+        """
+        config = self.config
+        output = config["output"]
+        writer_mode = output["writer"]
+        if image_writer is None and writer_mode == "async":
+            from .image_writer import ImageWriter
+
+            image_writer = ImageWriter(self.camera.save_frame, max_workers=output["writer_workers"],
+                                       max_pending=output["writer_pending"], executor=self.writer_executor)
+        elif writer_mode not in ("async", "sync", "container"):
+            raise ValueError(f"Unknown writer mode '{writer_mode}'.")
+
+        tracer = None
+        if config["trace_file"]:
+            from .capture_trace import CaptureTracer
+
+            tracer = CaptureTracer(config["trace_file"])
+        if self.metrics is not None:
+            from .metrics import MetricsTracer
+
+            tracer = MetricsTracer(self.metrics, tracer)
+
+        kwargs = dict(image_writer=image_writer, use_container=writer_mode == "container", tracer=tracer,
+                      output_root=output["root"], layers=config["layers"])
+        if config["handler"] == "batch":
+            handler = BatchCommandHandler(self.serial, self.camera, layer_base=config["layer_base"], **kwargs)
+        else:
+            handler = CommandHandler(self.serial, self.camera, product_id=product_id, username=username, **kwargs)
+
+        fsync = output["fsync"]
+        if config["confirm_saved"] and fsync == "none":
+            fsync = "file"  # Ack only once the image is on disk
+        handler.committer = ImageCommitter(fsync, executor=getattr(image_writer, "executor", None))
+        flush = config["flush"]
+        handler.ready_flush_frames = flush["ready"]
+        handler.layer_flush_frames = flush["layer"]
+        handler.capture_flush_frames = flush["capture"]
+        handler.settle_time = config["settle_time"]
+        handler.layer_offset = config["layer_offset"]
+        handler.progress_position = self.progress_position
+        resume = config["resume"]
+        handler.resume = resume["enabled"]
+        handler.journal_sync_every = resume["sync_every"]
+        handler.journal_sync_seconds = resume["sync_ms"] / 1000.0
+        quality = config["quality"]
+        if quality["enabled"]:
+            from .quality_gate import QualityGate
+
+            handler.quality_gate = QualityGate(quality["min_sharpness"], quality["max_dark"], quality["max_bright"],
+                                               quality["decimate"], quality["budget_ms"], quality["retries"],
+                                               log_path=quality["log_file"])
+        duplicates = config["duplicates"]
+        if duplicates["enabled"]:
+            from .frame_hash import DuplicateDetector
+
+            handler.duplicate_detector = DuplicateDetector(duplicates["threshold"], duplicates["action"],
+                                                           duplicates["retries"])
+        previews = config["previews"]
+        if previews["enabled"]:
+            from .previews import PreviewWriter
+
+            handler.preview_writer = PreviewWriter(previews["preview_size"], previews["thumbnail_size"],
+                                                   previews["quality"], previews["contact_columns"])
+        mosaic = config["mosaic"]
+        if mosaic["enabled"]:
+            from .mosaic import MosaicBuilder
+
+            handler.mosaic_builder = MosaicBuilder(mosaic["scale"], mosaic["min_response"])
+        if output["manifest"]:
+            from .manifest import open_manifest
+
+            handler.manifest = open_manifest(handler.output_root, output["manifest"])
+        if self.metrics is not None:
+            handler.metrics = self.metrics
+            self.metrics.handler = handler
+        if config.get("name"):
+            handler.progress_label = f"[{self.name}] "
+        return handler
+
+    def close(self):
+        if self.metrics is not None:
+            from .metrics import stop_metrics
+
+            stop_metrics(self.metrics)
+            self.metrics = None
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+        if self.camera is not None:
+            self.camera.release()
+            self.camera = None
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import os
+import socket
+from collections import deque
+
+from .async_controller import AsyncController
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+DEFAULT_SOCKET_PATH = "/tmp/plc_station.sock"
+
+
+# =========================
+# StationDaemon Class
+# =========================
+
+class StationDaemon:
+    """Long-lived station process that keeps the camera and serial port open.
+
+    Products are queued over a Unix domain socket instead of being typed at an
+    ``input()`` prompt, so changing over to the next product skips reopening
+    the serial port, reconfiguring the camera and the start-up flush.
+
+    Socket commands (one per line, one reply line back):
+      start <product_id> <username>   queue a product run
+      status                          current product, progress and queue
+      stop                            interrupt the current run and shut down
+    """
+
+    def __init__(self, serial_controller, camera, handler_factory, socket_path=DEFAULT_SOCKET_PATH):
+        self.serial = serial_controller
+        self.camera = camera
+        self.handler_factory = handler_factory
+        self.socket_path = socket_path
+        self.queue = deque()
+        self.current = None
+        self.handler = None
+        self.completed = 0
+        self._wakeup = None
+        self._stopping = None
+
+    async def serve(self):
+        """Accept control connections and run queued products until ``stop``."""
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        log.info("Station daemon listening on %s", self.socket_path)
+        worker = asyncio.create_task(self._run_products())
+        try:
+            await self._stopping.wait()
+        finally:
+            worker.cancel()
+            await asyncio.gather(worker, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            log.info("Station daemon stopped.")
+
+    async def _run_products(self):
+        while True:
+            while not self.queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            product_id, username = self.queue.popleft()
+            self.current = product_id
+            try:
+                await self._run_product(product_id, username)
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.error("Product %s failed: %s", product_id, e)
+            finally:
+                self.current = None
+                self.handler = None
+
+    async def _run_product(self, product_id, username):
+        # Product start and finish block (flushes, preallocation, waiting for writes); keep them off the event
+        # loop, which other stations of a multi-station process share
+        loop = asyncio.get_running_loop()
+        handler = await loop.run_in_executor(None, self.handler_factory, product_id, username)
+        self.handler = handler
+        controller = AsyncController(self.serial, handler)
+        try:
+            await loop.run_in_executor(None, handler.handle_ready)
+            await controller.run()
+        finally:
+            await loop.run_in_executor(None, controller.close)
+            await loop.run_in_executor(None, handler.finish_writes)
+            if getattr(handler, "total_bar", None):
+                handler.total_bar.close()
+        log.info("Product %s finished.", product_id)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            line = (await reader.readline()).decode("utf-8", errors="replace").strip()
+            writer.write((self.handle_command(line) + "\n").encode("utf-8"))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def handle_command(self, line):
+        """Execute one control command and return the reply line."""
+        parts = line.split()
+        if not parts:
+            return "error empty command"
+        action = parts[0].lower()
+        if action == "start":
+            if len(parts) != 3:
+                return "error usage: start <product_id> <username>"
+            self.queue.append((parts[1], parts[2]))
+            self._wakeup.set()
+            return f"queued {parts[1]} position {len(self.queue)}"
+        if action == "status":
+            return self.status()
+        if action == "stop":
+            self._stopping.set()
+            return "stopping"
+        return f"error unknown command '{action}'"
+
+    def status(self):
+        queued = ",".join(product_id for product_id, _ in self.queue) or "-"
+        if self.current is None:
+            return f"idle completed={self.completed} queue={queued}"
+        done = 0
+        total = 0
+        if self.handler is not None and getattr(self.handler, "total_bar", None):
+            done = self.handler.total_bar.n
+            total = self.handler.total_bar.total
+        return f"running product={self.current} progress={done}/{total} completed={self.completed} queue={queued}"
+
+
+def send_command(line, socket_path=DEFAULT_SOCKET_PATH, timeout=5):
+    """Send one command to a running daemon and return its reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall((line + "\n").encode("utf-8"))
+        reply = b""
+        while not reply.endswith(b"\n"):
+            chunk = client.recv(4096)
+            if not chunk:
+                break
+            reply += chunk
+    return reply.decode("utf-8").strip()
+
+
+# =========================
+# Main Function
+# =========================
+
+def serve(socket_path, config):
+    from .logs import setup_logging
+    from .station import Station
+
+    setup_logging(config["logging"])
+    station = Station(config)
+    try:
+        station.open()
+        daemon = StationDaemon(station.serial, station.camera, station.create_handler, socket_path=socket_path)
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        log.info("Station daemon interrupted.")
+    finally:
+        station.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="plc-control daemon",
+                                     description="Warm-standby station daemon and its control client.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Unix domain socket path.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Run the daemon in the foreground.")
+    serve_parser.add_argument("--config", help="Station config file (JSON).")
+    serve_parser.add_argument("--variant", help="Controller variant, overrides the config file.")
+    serve_parser.add_argument("--port", help="Serial port of the PLC, overrides the config file.")
+
+    start_parser = subparsers.add_parser("start", help="Queue a product run.")
+    start_parser.add_argument("product_id")
+    start_parser.add_argument("username")
+
+    subparsers.add_parser("status", help="Show the daemon state.")
+    subparsers.add_parser("stop", help="Stop the daemon.")
+
+    args = parser.parse_args(argv)
+    if args.action == "serve":
+        from .config import load_config
+
+        overrides = {"serial": {"port": args.port}} if args.port else None
+        serve(args.socket, load_config(args.config, args.variant, overrides))
+    elif args.action == "start":
+        print(send_command(f"start {args.product_id} {args.username}", args.socket))
+    else:
+        print(send_command(args.action, args.socket))
+
+
+if __name__ == "__main__":
+    main()
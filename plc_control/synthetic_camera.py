@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from collections import deque
+
+from .logs import get_logger
+
+
+log = get_logger(__name__)
+
+
+SOURCES = ("pattern", "noise")  # Anything else is a directory of images
+NOISE_FRAMES = 8  # Distinct noise frames generated up front and cycled
+
+
+# =========================
+# SyntheticCapture Class
+# =========================
+
+class SyntheticCapture:
+    """cv2.VideoCapture stand-in that behaves like a V4L2 camera.
+
+    The sensor exposes a frame every ``1 / fps`` seconds from the moment the
+    capture is opened. Exposed frames are queued in ``buffer_depth`` driver
+    buffers (V4L2 defaults to 4); while every buffer is full, new exposures
+    are dropped, so a reader that falls behind gets stale frames first -
+    exactly what ``flush_camera_buffer`` has to clear. ``read`` returns a
+    queued frame immediately, otherwise it sleeps until the next exposure.
+    ``fps=0`` disables the frame clock and returns frames as fast as they
+    can be copied.
+
+    ``source`` is ``"pattern"`` (gradient with sensor noise), ``"noise"``
+    or a directory of images that are cycled in name order. The sensor size
+    is the largest resolution ``set`` will accept. The index of every frame
+    is stamped into the first pixels of row 0, and ``CAP_PROP_POS_MSEC``
+    reports the exposure time of the last frame read on the
+    ``time.monotonic()`` clock, as V4L2 does.
+    """
+
+    def __init__(self, source="pattern", width=2048, height=2048, fps=30, buffer_depth=4, seed=0):
+        self.source = source
+        self.sensor_width = width
+        self.sensor_height = height
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.buffer_depth = buffer_depth
+        self.seed = seed
+        self.frames = None  # Built on first read, after the resolution has been set
+        self.opened = True
+        self.dropped = 0  # Exposures lost because every driver buffer was full
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._start = time.monotonic()
+        self._next_index = 0
+        self._last_index = -1
+        self._last_exposure = 0.0
+
+    def isOpened(self):
+        return self.opened
+
+    def set(self, prop, value):
+        import cv2
+
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = min(int(value), self.sensor_width)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = min(int(value), self.sensor_height)
+        elif prop == cv2.CAP_PROP_FPS:
+            self._restart(fps=float(value))
+            return True
+        elif prop == cv2.CAP_PROP_BUFFERSIZE:
+            self._restart(buffer_depth=max(1, int(value)))
+            return True
+        else:
+            return False
+        self.frames = None
+        return True
+
+    def get(self, prop):
+        import cv2
+
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width,
+                cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_FPS: self.fps,
+                cv2.CAP_PROP_BUFFERSIZE: self.buffer_depth,
+                cv2.CAP_PROP_POS_FRAMES: self._last_index + 1,
+                cv2.CAP_PROP_POS_MSEC: self._last_exposure * 1000.0}.get(prop, 0.0)
+
+    def _restart(self, **settings):
+        with self._lock:
+            for key, value in settings.items():
+                setattr(self, key, value)
+            self._queue.clear()
+            self._start = time.monotonic()
+            self._next_index = 0
+
+    def _exposure_time(self, index):
+        return self._start + index / self.fps
+
+    def _fill(self, now):
+        """Queue every frame exposed up to ``now`` while driver buffers are free."""
+        while len(self._queue) < self.buffer_depth and self._exposure_time(self._next_index) <= now:
+            self._queue.append(self._next_index)
+            self._next_index += 1
+
+    def grab(self):
+        """Dequeue the oldest buffered frame, waiting for the next exposure if none is queued."""
+        if not self.opened:
+            return False
+        if not self.fps:
+            self._last_index += 1
+            self._last_exposure = time.monotonic()
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._fill(now)
+            if not self._queue:
+                wait = self._exposure_time(self._next_index) - now
+                if wait > 0:
+                    time.sleep(wait)
+                now = time.monotonic()
+                self._fill(now)
+            was_full = len(self._queue) >= self.buffer_depth
+            index = self._queue.popleft()
+            if was_full:
+                # The driver had no free buffer: everything exposed since is lost
+                first_free = int((now - self._start) * self.fps) + 1
+                if first_free > self._next_index:
+                    self.dropped += first_free - self._next_index
+                    self._next_index = first_free
+            self._last_index = index
+            self._last_exposure = self._exposure_time(index)
+        return True
+
+    def retrieve(self, image=None):
+        """Return the frame dequeued by the last ``grab``."""
+        if self._last_index < 0:
+            return False, None
+        if self.frames is None:
+            self.frames = self._build_frames()
+        source = self.frames[self._last_index % len(self.frames)]
+        if image is not None and image.shape == source.shape and image.dtype == source.dtype:
+            image[...] = source
+            frame = image
+        else:
+            frame = source.copy()
+        frame[0, :4, 0] = list(self._last_index.to_bytes(4, byteorder='little'))
+        return True, frame
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        self.opened = False
+        self.frames = None
+
+    def _build_frames(self):
+        import numpy as np
+
+        rng = np.random.default_rng(self.seed)
+        shape = (self.height, self.width, 3)
+        if self.source == "pattern":
+            gradient = np.linspace(0, 200, self.width, dtype=np.float32)[None, :, None]
+            noise = rng.normal(0, 12, size=shape).astype(np.float32)
+            return [np.clip(gradient + noise + 20, 0, 255).astype(np.uint8)]
+        if self.source == "noise":
+            return [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(NOISE_FRAMES)]
+        return self._load_directory(self.source)
+
+    def _load_directory(self, directory):
+        import cv2
+
+        frames = []
+        for name in sorted(os.listdir(directory)):
+            image = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+            if image is None:
+                continue  # Not an image
+            if image.shape[:2] != (self.height, self.width):
+                image = cv2.resize(image, (self.width, self.height), interpolation=cv2.INTER_AREA)
+            frames.append(image)
+        if not frames:
+            raise Exception(f"No readable images in {directory}.")
+        log.info("Synthetic camera loaded %d frame(s) from %s", len(frames), directory)
+        return frames
@@ -0,0 +1,55 @@
+import time
+
+from plc_control.frame_grabber import FrameGrabber
+from plc_control.frame_pool import FramePool
+
+
+class FakeCapture:
+    """cv2.VideoCapture stand-in delivering numbered frames at a fixed rate, without device timestamps."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.frames = 0
+
+    def read(self, image=None):
+        time.sleep(self.interval)
+        self.frames += 1
+        image[...] = self.frames % 256
+        return True, image
+
+    def get(self, prop):
+        return 0
+
+
+def test_grabber_keeps_reading_when_the_ring_holds_every_buffer():
+    pool = FramePool((4, 4, 3), count=4)
+    grabber = FrameGrabber(FakeCapture(), ring_size=4, pool=pool)
+    grabber.start()
+    try:
+        started = time.monotonic()
+        for _ in range(20):
+            item = grabber.wait_for_frame(time.monotonic(), timeout=0.4)
+            assert item is not None
+            pool.release(item.frame)
+        assert time.monotonic() - started < 2.0
+    finally:
+        grabber.stop()
+    assert pool.in_use == 0
+
+
+def test_grabber_reads_again_once_a_held_frame_is_released():
+    pool = FramePool((4, 4, 3), count=2)
+    grabber = FrameGrabber(FakeCapture(), ring_size=4, pool=pool)
+    grabber.start()
+    try:
+        held = [grabber.wait_for_frame(time.monotonic(), timeout=0.4) for _ in range(2)]
+        assert all(item is not None for item in held)
+        assert grabber.wait_for_frame(time.monotonic(), timeout=0.1) is None  # Both buffers held by the caller
+        pool.release(held[0].frame)
+        item = grabber.wait_for_frame(time.monotonic(), timeout=1.0)
+        assert item is not None
+        pool.release(item.frame)
+        pool.release(held[1].frame)
+    finally:
+        grabber.stop()
+    assert pool.in_use == 0
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from plc_control.frame_pool import FramePool
+
+
+def test_buffers_are_reused_at_refcount_zero():
+    pool = FramePool((4, 4, 3), count=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    assert pool.in_use == 2
+    assert pool.acquire(timeout=0) is None
+
+    pool.retain(first)  # A consumer keeps it past the capture call
+    pool.release(first)
+    assert pool.acquire(timeout=0) is None
+    pool.release(first)
+    assert pool.in_use == 1
+    assert pool.acquire(timeout=0) is first
+    assert pool.peak == 2
+
+
+def test_acquire_waits_for_a_release():
+    pool = FramePool((4, 4, 3), count=1)
+    frame = pool.acquire()
+    threading.Timer(0.05, pool.release, (frame,)).start()
+    assert pool.acquire(timeout=2) is frame
+    assert pool.waits == 1
+    assert pool.wait_seconds > 0
+
+
+def test_acquire_times_out():
+    pool = FramePool((4, 4, 3), count=1)
+    pool.acquire()
+    assert pool.acquire(timeout=0.01) is None
+    assert pool.waits == 1
+
+
+def test_foreign_arrays_are_ignored():
+    import numpy as np
+
+    pool = FramePool((4, 4, 3), count=1)
+    frame = np.zeros((4, 4, 3), dtype=np.uint8)
+    assert pool.retain(frame) is frame
+    pool.release(frame)
+    assert pool.in_use == 0
+
+
+def test_release_without_reference_raises():
+    pool = FramePool((4, 4, 3), count=1)
+    frame = pool.acquire()
+    pool.release(frame)
+    with pytest.raises(Exception):
+        pool.release(frame)
+
+
+def test_max_bytes_caps_the_count():
+    pool = FramePool((4, 4, 3), count=24, max_bytes=48 * 5)
+    assert pool.count == 5
+    with pytest.raises(ValueError):
+        FramePool((4, 4, 3), count=24, max_bytes=47)
+
+
+def test_pool_no_larger_than_the_reserve_is_rejected():
+    FramePool((4, 4, 3), count=13, reserve=12)
+    with pytest.raises(ValueError):
+        FramePool((4, 4, 3), count=12, reserve=12)
+    with pytest.raises(ValueError):
+        FramePool((4, 4, 3), count=24, max_bytes=48 * 8, reserve=12)
@@ -0,0 +1,75 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from plc_control.image_commit import ImageCommitter
+
+
+def write_image(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"image")
+    return str(path)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        ImageCommitter("always")
+
+
+@pytest.mark.parametrize("policy", ["none", "file"])
+def test_image_is_durable_once_written(tmp_path, policy):
+    committer = ImageCommitter(policy)
+    path = write_image(tmp_path, "a.png")
+    commit = committer.begin(path)
+    assert not commit.future.done()
+    commit.written(5)
+    assert commit.future.result(timeout=0) == 5
+    committer.close()
+
+
+def test_failed_write_resolves_at_once_under_group_commit(tmp_path):
+    committer = ImageCommitter("layer")
+    commit = committer.begin(str(tmp_path / "missing.png"))
+    commit.written(False)
+    assert commit.future.result(timeout=0) is False
+    committer.close()
+    assert committer.group_commits == 0
+
+
+def test_layer_is_committed_after_seal_and_last_write(tmp_path):
+    committer = ImageCommitter("layer")
+    first = committer.begin(write_image(tmp_path, "1.png"))
+    second = committer.begin(write_image(tmp_path, "2.png"))
+    first.written(1)
+    committer.seal()
+    assert not first.future.done()  # The second write of the layer is still running
+    next_layer = committer.begin(write_image(tmp_path, "3.png"))
+    second.written(2)
+    assert first.future.result(timeout=0) == 1
+    assert second.future.result(timeout=0) == 2
+    assert committer.group_commits == 1
+
+    next_layer.written(3)
+    assert not next_layer.future.done()
+    committer.close()
+    assert next_layer.future.result(timeout=0) == 3
+    assert committer.group_commits == 2
+
+
+def test_sealed_layer_is_committed_on_the_executor(tmp_path):
+    with ThreadPoolExecutor(1) as executor:
+        committer = ImageCommitter("layer", executor=executor)
+        commit = committer.begin(write_image(tmp_path, "1.png"))
+        commit.written(1)
+        committer.seal()
+        assert commit.future.result(timeout=5) == 1
+        committer.close()
+
+
+def test_close_waits_for_outstanding_writes(tmp_path):
+    committer = ImageCommitter("none")
+    commit = committer.begin(write_image(tmp_path, "1.png"))
+    threading.Timer(0.05, commit.written, (1,)).start()
+    committer.close()
+    assert commit.future.done()
@@ -0,0 +1,79 @@
+import os
+
+from plc_control.journal import JOURNAL_NAME, CaptureJournal, read_journal, unfinished_journal
+
+
+def touch(directory, name):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"image")
+    return path
+
+
+def test_interrupted_product_is_resumed(tmp_path):
+    directory = str(tmp_path)
+    journal = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    journal.record(1, 1, touch(directory, "layer1_section1.png"))
+    journal.record(1, 2, touch(directory, "layer1_section2.png"))
+    journal.close()
+    assert unfinished_journal(directory)
+
+    resumed = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    assert resumed.done(1, 1) and resumed.done(1, 2)
+    assert not resumed.done(1, 3)
+    assert resumed.holds(os.path.join(directory, "layer1_section2"))
+    resumed.record(1, 3, touch(directory, "layer1_section3.png"))
+    resumed.close(finished=True)
+
+    entries, finished = read_journal(os.path.join(directory, JOURNAL_NAME))
+    assert [entry[:2] for entry in entries] == [(1, 1), (1, 2), (1, 3)]
+    assert finished
+    assert not unfinished_journal(directory)
+
+
+def test_entries_whose_file_is_gone_are_dropped(tmp_path):
+    directory = str(tmp_path)
+    journal = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    journal.record(2, 1, touch(directory, "kept.png"))
+    journal.record(2, 2, touch(directory, "lost.png"))
+    journal.close()
+    os.remove(os.path.join(directory, "lost.png"))
+
+    resumed = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    assert resumed.done(2, 1)
+    assert not resumed.done(2, 2)
+    resumed.close()
+
+
+def test_finished_journal_starts_afresh(tmp_path):
+    directory = str(tmp_path)
+    journal = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    journal.record(1, 1, touch(directory, "a.png"))
+    journal.close(finished=True)
+
+    fresh = CaptureJournal(os.path.join(directory, JOURNAL_NAME))
+    assert not fresh.completed
+    fresh.close()
+    assert read_journal(os.path.join(directory, JOURNAL_NAME)) == ([], False)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    directory = str(tmp_path)
+    path = os.path.join(directory, JOURNAL_NAME)
+    journal = CaptureJournal(path)
+    journal.record(1, 1, touch(directory, "a.png"))
+    journal.close()
+    with open(path, "a") as f:
+        f.write("1\t2\tb.p")  # Crashed mid-record
+
+    resumed = CaptureJournal(path)
+    assert resumed.done(1, 1) and not resumed.done(1, 2)
+    resumed.record(1, 2, touch(directory, "b.png"))
+    resumed.close()
+    entries, _ = read_journal(path)
+    assert [entry[:2] for entry in entries] == [(1, 1), (1, 2)]
+
+
+def test_no_journal(tmp_path):
+    assert read_journal(os.path.join(str(tmp_path), JOURNAL_NAME)) == (None, False)
+    assert not unfinished_journal(str(tmp_path))
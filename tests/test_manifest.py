@@ -0,0 +1,68 @@
+import os
+import threading
+
+from plc_control.manifest import Manifest, open_manifest
+
+
+def test_batches_are_numbered_in_order(tmp_path):
+    manifest = open_manifest(str(tmp_path))
+    assert manifest.start_batch("P1", "alice") == 1
+    assert manifest.start_batch("P2", "bob") == 2
+    manifest.discard_batch(2)
+    assert manifest.start_batch("P3", "carol") == 2
+    assert [batch["product_id"] for batch in manifest.batches()] == ["P1", "P3"]
+    manifest.close()
+
+
+def test_first_id_skips_existing_folders(tmp_path):
+    manifest = open_manifest(str(tmp_path))
+    assert manifest.start_batch(first_id=7) == 7
+    assert manifest.start_batch(first_id=3) == 8
+    manifest.close()
+
+
+def test_concurrent_stations_never_share_a_batch(tmp_path):
+    path = os.path.join(str(tmp_path), "manifest.sqlite3")
+    Manifest(path).close()  # Create the schema before the race
+    ids = []
+    lock = threading.Lock()
+
+    def allocate():
+        manifest = Manifest(path)
+        try:
+            for _ in range(10):
+                batch_id = manifest.start_batch("P")
+                with lock:
+                    ids.append(batch_id)
+        finally:
+            manifest.close()
+
+    threads = [threading.Thread(target=allocate) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(ids) == list(range(1, 41))
+
+
+def test_latest_batch_of_an_output_dir(tmp_path):
+    manifest = open_manifest(str(tmp_path))
+    first = manifest.start_batch("P", output_dir="/data/P_a")
+    manifest.start_batch("Q", output_dir="/data/Q_b")
+    assert manifest.latest_batch()["product_id"] == "Q"
+    assert manifest.latest_batch("/data/P_a")["id"] == first
+    assert manifest.latest_batch("/data/other") is None
+    manifest.close()
+
+
+def test_images_are_found_by_layer_and_section(tmp_path):
+    manifest = open_manifest(str(tmp_path))
+    batch = manifest.start_batch("P")
+    for section in (1, 2):
+        manifest.record_image(batch, "P", 1, section, f"layer1/{section}.png", size=10, checksum=section)
+    manifest.record_image(batch, "P", 2, 1, "layer2/1.png")
+    assert [image["path"] for image in manifest.images(product_id="P", layer=1)] == ["layer1/1.png", "layer1/2.png"]
+    image, = manifest.images(batch_id=batch, layer=1, section=2)
+    assert (image["size"], image["checksum"]) == (10, 2)
+    assert image["written_at"] is not None
+    manifest.close()
@@ -0,0 +1,51 @@
+import threading
+
+from plc_control.capture_trace import CaptureSpan
+from plc_control.metrics import Counter, Histogram, MetricsTracer, StationMetrics, render
+
+
+def run_threads(target, count):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counter_sums_threads_and_folds_exited_ones():
+    counter = Counter()
+    run_threads(lambda: [counter.inc() for _ in range(100)], 8)
+    counter.inc(5)
+    assert counter.value == 805
+    assert len(counter._cells) == 1  # Only this thread's cell is left
+    run_threads(counter.inc, 8)
+    assert counter.value == 813
+    assert len(counter._cells) == 1
+
+
+def test_histogram_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    run_threads(lambda: histogram.observe(0.2), 3)
+    cumulative, count, total = histogram.snapshot()
+    assert cumulative == [2, 6, 7]
+    assert count == 7
+    assert abs(total - 3.25) < 1e-9
+
+
+def test_cycle_time_is_the_trace_total():
+    metrics = StationMetrics("cell1")
+    tracer = MetricsTracer(metrics)
+    span = tracer.begin(1, 2, received_at=10.0)
+    span.stages = [("grab", 0.0, 0.03), ("ack", 0.03, 0.01)]
+    span.last = 10.04
+    span.end(500)
+    assert isinstance(span, CaptureSpan)
+    _, count, total = metrics.cycle_seconds.snapshot()
+    assert count == 1 and abs(total - 0.04) < 1e-9
+    text = render([metrics])
+    assert 'plc_cycle_seconds_count{station="cell1"} 1' in text
+    assert 'plc_cycle_seconds_bucket{station="cell1",le="0.05"} 1' in text
+    assert 'plc_captures_total{station="cell1",result="captured"} 1' in text
+    assert 'plc_capture_stage_seconds_count{station="cell1",stage="grab"} 1' in text
@@ -0,0 +1,65 @@
+from plc_control.plc_protocol import Command, FrameParser, build_replay_stream, encode_command, replay
+
+
+def parse_chunks(*chunks):
+    """Feed each chunk in turn and return the commands completed after every chunk."""
+    parser = FrameParser()
+    return [list(parser.parse(chunk)) for chunk in chunks], parser
+
+
+def test_six_and_two_byte_frames():
+    (commands,), _ = parse_chunks(encode_command(400, 1, 2) + encode_command(700))
+    assert commands == [Command(400, 1, 2), Command(700, None, None)]
+
+
+def test_split_frame_completes_when_the_rest_arrives():
+    frame = encode_command(400, 3, 7)
+    for cut in range(1, len(frame)):
+        results, parser = parse_chunks(frame[:cut], frame[cut:])
+        assert results == [[], [Command(400, 3, 7)]]
+        assert parser.discarded_bytes == 0
+
+
+def test_byte_by_byte():
+    stream = encode_command(400, 1, 1) + encode_command(400, 1, 2) + encode_command(700)
+    results, _ = parse_chunks(*(stream[i:i + 1] for i in range(len(stream))))
+    assert [command for result in results for command in result] == [
+        Command(400, 1, 1), Command(400, 1, 2), Command(700, None, None)]
+
+
+def test_crlf_inside_payload():
+    # Section 0x0a0d puts 0d 0a inside the frame; the terminator is found by position, not by splitting
+    frame = encode_command(400, 2, 0x0A0D)
+    assert frame[4:6] == b"\r\n"
+    results, parser = parse_chunks(frame[:6], frame[6:])
+    assert results == [[], [Command(400, 2, 0x0A0D)]]
+    assert parser.discarded_bytes == 0
+
+
+def test_dropped_byte_resyncs_on_the_next_resend():
+    frame = encode_command(400, 1, 2)
+    truncated = frame[:-1]  # Lost the final LF; the PLC resends after its ack timeout
+    results, parser = parse_chunks(truncated, frame, frame, frame)
+    assert results == [[], [Command(400, 1, 2)], [Command(400, 1, 2)], [Command(400, 1, 2)]]
+    assert parser.discarded_bytes == len(truncated)
+
+
+def test_dropped_payload_byte_resyncs_on_the_next_resend():
+    frame = encode_command(400, 4, 9)
+    truncated = frame[:3] + frame[4:]  # Lost a layer byte
+    results, parser = parse_chunks(truncated, frame)
+    assert results == [[], [Command(400, 4, 9)]]
+    assert parser.discarded_bytes == len(truncated)
+
+
+def test_line_noise_between_frames():
+    stream, expected = build_replay_stream([1, 8, 12], repeats=3, garbage_every=3, seed=1)
+    commands, _, parser = replay(stream)
+    assert commands == expected
+    assert parser.discarded_bytes > 0
+
+
+def test_unknown_command_bytes_are_skipped():
+    (commands,), parser = parse_chunks(b"\x00\xff\x13" + encode_command(400, 1, 1))
+    assert commands == [Command(400, 1, 1)]
+    assert parser.discarded_bytes == 3